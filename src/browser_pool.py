@@ -0,0 +1,192 @@
+"""
+Pool of warm Chromium browsers shared by WebScraperAgent instances.
+
+Launching Chromium takes one to two seconds, so browsers are kept alive
+after use and handed to the next agent instead of being closed.
+
+Playwright objects only work on the event loop that created them, so the
+pool binds itself to the running loop and starts afresh when a new loop
+(e.g. a second asyncio.run) uses it.
+"""
+import asyncio
+import weakref
+from collections import deque
+from playwright.async_api import async_playwright, Browser, Playwright
+from typing import Deque, Optional
+from config import BROWSER_ARGS, BROWSER_POOL_SIZE
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPool:
+    """Keeps up to max_size launched Chromium browsers for reuse."""
+
+    def __init__(self, max_size: int = BROWSER_POOL_SIZE):
+        self.max_size = max_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._playwright: Optional[Playwright] = None
+        self._idle: Deque[Browser] = deque()
+        # Notified whenever a browser is returned or a slot is freed
+        self._changed: Optional[asyncio.Condition] = None
+        # Browsers launched on the current loop and counted in _launched
+        self._browsers: "weakref.WeakSet[Browser]" = weakref.WeakSet()
+        self._launched = 0
+        logger.info("BrowserPool created with max size %d", max_size)
+
+    def _reset(self) -> None:
+        """Forget Playwright, idle browsers and slot accounting."""
+        self._playwright = None
+        self._idle = deque()
+        self._changed = None
+        self._browsers = weakref.WeakSet()
+        self._launched = 0
+
+    def _bind_loop(self) -> None:
+        """
+        Tie the pool to the running event loop.
+        
+        State left over from an earlier, usually closed, loop can't be used
+        or closed from this one, so it is dropped and rebuilt on demand.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            logger.warning("Event loop changed, discarding browser pool state from the previous loop")
+        self._loop = loop
+        self._reset()
+
+    def _condition(self) -> asyncio.Condition:
+        """Return the pool's condition, creating it inside the running event loop."""
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    async def get_playwright(self) -> Playwright:
+        """
+        Return the pool's Playwright instance, starting it on first use.
+        
+        Lets agents that launch their own browser (e.g. with a persistent
+        profile) share the driver process; pool.close() stops it.
+        """
+        self._bind_loop()
+        if self._playwright is None:
+            logger.info("Starting Playwright")
+            self._playwright = await async_playwright().start()
+        return self._playwright
+
+    async def _launch(self) -> Browser:
+        """Launch a new headless Chromium."""
+        playwright = await self.get_playwright()
+        logger.info("Launching pooled browser (%d/%d)", self._launched, self.max_size)
+        return await playwright.chromium.launch(
+            headless=True,
+            args=BROWSER_ARGS
+        )
+
+    async def acquire(self) -> Browser:
+        """
+        Take a browser from the pool, launching one if the pool isn't full.
+
+        Waits when max_size browsers are already in use until one is
+        released or a slot is freed (e.g. by a crashed browser).
+
+        Returns:
+            Browser: A connected Chromium browser
+        """
+        self._bind_loop()
+        changed = self._condition()
+        async with changed:
+            while True:
+                while self._idle:
+                    browser = self._idle.popleft()
+                    if browser.is_connected():
+                        return browser
+                    # Browser crashed while idle; drop it and look again
+                    logger.warning("Discarding disconnected pooled browser")
+                    self._browsers.discard(browser)
+                    self._launched -= 1
+                if self._launched < self.max_size:
+                    # Reserve the slot before launching so concurrent
+                    # acquires can't overshoot max_size
+                    self._launched += 1
+                    break
+                await changed.wait()
+
+        try:
+            browser = await self._launch()
+        except Exception:
+            async with changed:
+                self._launched -= 1
+                changed.notify()
+            raise
+        self._browsers.add(browser)
+        return browser
+
+    async def release(self, browser: Browser) -> None:
+        """
+        Return a browser to the pool for reuse.
+
+        Args:
+            browser: A browser previously returned by acquire()
+        """
+        if browser not in self._browsers:
+            # Acquired on a loop whose pool state has since been discarded
+            return
+        changed = self._condition()
+        async with changed:
+            if browser.is_connected():
+                self._idle.append(browser)
+            else:
+                self._browsers.discard(browser)
+                self._launched -= 1
+            # Either way a waiting acquire can now proceed
+            changed.notify()
+
+    async def warm_up(self, n: int = 2) -> None:
+        """
+        Pre-launch browsers so later acquires skip the cold start.
+
+        Args:
+            n: Number of idle browsers to have ready (capped at max_size)
+        """
+        self._bind_loop()
+        to_launch = min(n - len(self._idle), self.max_size - self._launched)
+        if to_launch <= 0:
+            return
+        logger.info("Warming up %d browsers", to_launch)
+        self._launched += to_launch
+        results = await asyncio.gather(
+            *(self._launch() for _ in range(to_launch)), return_exceptions=True
+        )
+        changed = self._condition()
+        async with changed:
+            for result in results:
+                if isinstance(result, BaseException):
+                    logger.error("Failed to warm up browser: %s", result)
+                    self._launched -= 1
+                else:
+                    self._browsers.add(result)
+                    self._idle.append(result)
+            changed.notify_all()
+
+    async def close(self) -> None:
+        """Close idle browsers and stop Playwright."""
+        try:
+            # State from another loop can't be closed from this one
+            if self._loop is asyncio.get_running_loop():
+                logger.info("Closing browser pool")
+                while self._idle:
+                    await self._idle.popleft().close()
+                if self._playwright:
+                    await self._playwright.stop()
+        except Exception as e:
+            logger.error("Error closing browser pool: %s", e, exc_info=True)
+        finally:
+            self._loop = None
+            self._reset()
+
+
+# Shared pool used by WebScraperAgent
+browser_pool = BrowserPool()
@@ -3,6 +3,7 @@ Configuration settings for the web scraping application.
 """
 import os
 import logging
+from typing import Tuple
 
 # URLs
 TARGET_URL = "https://www.deeplearning.ai/courses"
@@ -13,11 +14,30 @@ DEFAULT_MODEL = "gpt-4o-mini-2024-07-18"
 MAX_HTML_TOKENS = 150000
 LLM_TEMPERATURE = 0.1
 
+# Shared HTTP/2 connection pool for OpenAI requests; keeping connections
+# alive avoids a TLS handshake per call
+LLM_HTTP_TIMEOUT = 60.0  # seconds
+LLM_MAX_CONNECTIONS = 20
+LLM_MAX_KEEPALIVE_CONNECTIONS = 10
+
+# Plain HTTP fetch tried before launching a browser; pages shorter than
+# FETCH_MIN_HTML_LENGTH or containing <noscript> fall back to Playwright
+FETCH_TIMEOUT = 15.0  # seconds
+FETCH_MIN_HTML_LENGTH = 1024
+FETCH_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Tags removed from page HTML before tokenization; they carry no content
+# for extraction but make up most of the tokens on typical pages
+HTML_STRIP_TAGS = ("script", "style", "noscript", "svg", "link", "meta", "iframe")
+
 # Default instructions
 DEFAULT_INSTRUCTIONS = "Get all the courses"
 
-# Browser settings
-BROWSER_ARGS = [
+# Browser settings (immutable; Playwright accepts any sequence)
+BROWSER_ARGS: Tuple[str, ...] = (
     "--disable-dev-shm-usage",
     "--no-sandbox",
     "--disable-setuid-sandbox",
@@ -28,13 +48,52 @@ BROWSER_ARGS = [
     "--disable-software-rasterizer",
     "--disable-webgl",
     "--disable-web-security",
-    "--disable-features=LazyFrameLoading",
-    "--disable-features=IsolateOrigins",
-    "--disable-background-networking"
-]
+    # Chromium only honours the last --disable-features, so list them together
+    "--disable-features=LazyFrameLoading,IsolateOrigins",
+    "--disable-background-networking",
+    "--no-first-run",
+    "--disable-extensions",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+)
+
+# Resource types aborted when a scraper blocks assets (HTML-only scrapes)
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+# Number of warm Chromium browsers kept by the shared browser pool
+BROWSER_POOL_SIZE = 3
+
+# On-disk Chromium profile for agents created with persistent_profile=True;
+# keeps the HTTP cache across runs. Only one browser can use it at a time.
+BROWSER_PROFILE_DIR = os.path.expanduser("~/.cache/ai-browser-agent/profile")
+
+# Screenshot settings; JPEG is much smaller and cheaper to encode than PNG
+# for preview screenshots. Quality only applies to JPEG; 80 keeps page text
+# legible for display and vision-model input.
+SCREENSHOT_FORMAT = "jpeg"
+SCREENSHOT_QUALITY = 80
+
+# Screenshots kept per agent for screenshot_buffer(use_cache=True), keyed by
+# a page-state fingerprint, so re-capturing an unchanged page skips
+# rasterization
+SCREENSHOT_CACHE_MAX_ENTRIES = 16
+
+# Maximum pages open at once on a shared browser
+MAX_CONCURRENT_PAGES = 5
+
+# In-memory cache of scraped HTML, keyed by URL
+CONTENT_CACHE_TTL = 300  # seconds
+CONTENT_CACHE_MAX_ENTRIES = 128
+
+# Navigation: return once the DOM is parsed rather than waiting for every
+# subresource ("load"); dynamic content is covered by PAGE_WAIT_TIMEOUT
+NAVIGATION_WAIT_UNTIL = "domcontentloaded"
 
 # Timeouts
-PAGE_WAIT_TIMEOUT = 2000  # milliseconds
+# Navigation budget kept short so one stuck URL can't hold up a batch;
+# if the response has committed by then, the partial DOM is scraped instead
+NAVIGATION_TIMEOUT = 8000  # milliseconds
+PAGE_WAIT_TIMEOUT = 2000  # max milliseconds to wait for dynamic content after load
 
 # Logging Configuration
 LOG_LEVEL = logging.INFO
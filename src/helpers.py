@@ -5,21 +5,74 @@ This module provides utility functions for API client initialization,
 environment variable management, and data visualization.
 """
 
+import asyncio
 import os
-from typing import Optional, List, Dict, Any
-import base64
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Tuple, Union
+import binascii
+import functools
+import hashlib
+import html
+from urllib.parse import urljoin, urlsplit
 from dotenv import load_dotenv, find_dotenv
+import httpx
 from openai import OpenAI
-from multion.client import MultiOn
-from io import BytesIO
-from PIL import Image
-from IPython.display import display, HTML, Markdown
+from pydantic import TypeAdapter
+from models import DeeplearningCourse
+
+# MultiOn and IPython are imported lazily inside the functions that use
+# them so a plain CLI run doesn't pay for their import at startup.
+if TYPE_CHECKING:
+    from multion.client import MultiOn
 
 
 # Environment Configuration
+# Resolved .env path and API keys are cached at module level so repeated
+# key lookups don't re-walk the directory tree or re-parse the file.
+_DOTENV_PATH: Optional[str] = None
+_ENV_LOADED = False
+_API_KEY_CACHE: Dict[str, str] = {}
+
+
 def load_env() -> None:
-    """Load environment variables from .env file."""
-    load_dotenv(find_dotenv())
+    """Load environment variables from .env file (at most once per process)."""
+    global _DOTENV_PATH, _ENV_LOADED
+    if _ENV_LOADED:
+        return
+    if _DOTENV_PATH is None:
+        _DOTENV_PATH = find_dotenv()
+    load_dotenv(_DOTENV_PATH)
+    _ENV_LOADED = True
+
+
+def clear_env_cache() -> None:
+    """Reset cached .env state, API keys and clients (mainly for tests)."""
+    global _DOTENV_PATH, _ENV_LOADED
+    _DOTENV_PATH = None
+    _ENV_LOADED = False
+    _API_KEY_CACHE.clear()
+    get_openai_client.cache_clear()
+    get_multi_on_client.cache_clear()
+
+
+def _get_api_key(name: str) -> Optional[str]:
+    """
+    Retrieve an API key from the environment, caching it after the first hit.
+    
+    Args:
+        name: Name of the environment variable.
+    
+    Returns:
+        Optional[str]: The key value, or None if not found.
+    """
+    api_key = _API_KEY_CACHE.get(name)
+    if api_key is None:
+        load_env()
+        api_key = os.getenv(name)
+        if api_key:
+            _API_KEY_CACHE[name] = api_key
+    return api_key
 
 
 def get_openai_api_key() -> Optional[str]:
@@ -29,13 +82,16 @@ def get_openai_api_key() -> Optional[str]:
     Returns:
         Optional[str]: The OpenAI API key, or None if not found.
     """
-    load_env()
-    return os.getenv("OPENAI_API_KEY")
+    return _get_api_key("OPENAI_API_KEY")
 
 
+@functools.lru_cache(maxsize=1)
 def get_openai_client() -> OpenAI:
     """
-    Create and return an OpenAI client instance.
+    Return the shared OpenAI client instance.
+    
+    The client is created on first use and reused so all callers share its
+    connection pool.
     
     Returns:
         OpenAI: Configured OpenAI client.
@@ -56,13 +112,16 @@ def get_multi_on_api_key() -> Optional[str]:
     Returns:
         Optional[str]: The MultiOn API key, or None if not found.
     """
-    load_env()
-    return os.getenv("MULTION_API_KEY")
+    return _get_api_key("MULTION_API_KEY")
 
 
-def get_multi_on_client() -> MultiOn:
+@functools.lru_cache(maxsize=1)
+def get_multi_on_client() -> "MultiOn":
     """
-    Create and return a MultiOn client instance.
+    Return the shared MultiOn client instance.
+    
+    The client is created on first use and reused so all callers share its
+    connection pool.
     
     Returns:
         MultiOn: Configured MultiOn client.
@@ -73,10 +132,119 @@ def get_multi_on_client() -> MultiOn:
     api_key = get_multi_on_api_key()
     if not api_key:
         raise ValueError("MULTION_API_KEY not found in environment variables")
+    from multion.client import MultiOn
     return MultiOn(api_key=api_key)
 
 
+class LoopLocalClient:
+    """
+    An httpx.AsyncClient shared within, but never across, event loops.
+    
+    httpx connections belong to the loop that opened them, so each running
+    loop gets its own client (e.g. a second asyncio.run starts afresh);
+    entries vanish with their loop.
+    """
+    
+    def __init__(self, **client_kwargs: Any):
+        """
+        Create an empty per-loop client registry.
+        
+        Args:
+            **client_kwargs: Arguments for each httpx.AsyncClient created
+        """
+        self._client_kwargs = client_kwargs
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+    
+    def get(self) -> httpx.AsyncClient:
+        """Return the running loop's client, creating it if missing or closed."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = self._clients[loop] = httpx.AsyncClient(**self._client_kwargs)
+        return client
+    
+    async def close(self) -> bool:
+        """
+        Close the running loop's client, if it has one.
+        
+        Returns:
+            bool: Whether a client was closed
+        """
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is None:
+            return False
+        await client.aclose()
+        return True
+
+
 # Visualization Functions
+# One compiled serializer for the whole course list, reused across calls
+_COURSES_ADAPTER = TypeAdapter(List[DeeplearningCourse])
+
+_CELL_STYLE = "border: 1px solid #dddddd; text-align: left; padding: 8px;"
+_TABLE_OPEN = '<table style="border-collapse: collapse; width: 100%;"><thead><tr>'
+_TH_OPEN = f'<th style="{_CELL_STYLE}">'
+_TH_CLOSE = '</th>'
+_TD_OPEN = f'<td style="{_CELL_STYLE}">'
+_TD_CLOSE = '</td>'
+_TR_OPEN = '<tr>'
+_TR_CLOSE = '</tr>'
+_HEAD_CLOSE = '</tr></thead><tbody>'
+_TABLE_CLOSE = '</tbody></table>'
+_ANCHOR_TMPL = '<a href="{url}" target="_blank">{title}</a>'
+_IMG_TMPL = '<img src="{}" alt="Course Image" style="max-width:100px; height:auto;">'
+
+
+# Scraped values come from arbitrary pages, so all of them are HTML-escaped
+_escape = html.escape
+
+# Escaping doesn't stop javascript:/data: links, so only these become anchors
+_LINK_SCHEMES = frozenset({'http', 'https'})
+
+
+@functools.lru_cache(maxsize=1024)
+def _join(base: str, rel: str) -> str:
+    """Resolve a URL against base_url; memoized since tables are re-rendered."""
+    return urljoin(base, rel)
+
+
+def _render_value(value: Any, course: Dict[str, Any], base_url: str) -> str:
+    """Render a plain cell value, joining lists with commas."""
+    if type(value) is list:
+        return _escape(', '.join(map(str, value)))
+    return _escape(str(value))
+
+
+def _render_course_link(value: Any, course: Dict[str, Any], base_url: str) -> str:
+    """
+    Render the course URL as a clickable link titled with the course name.
+    
+    Empty values and URLs that don't resolve to http(s) are shown as text.
+    """
+    if not value:
+        return _escape(str(value))
+    url = _join(base_url, value)
+    if urlsplit(url).scheme not in _LINK_SCHEMES:
+        return _escape(str(value))
+    return _ANCHOR_TMPL.format(url=_escape(url), title=_escape(str(course['title'])))
+
+
+def _render_image(value: Any, course: Dict[str, Any], base_url: str) -> str:
+    """Render an image URL as a thumbnail, resolving relative URLs."""
+    if value:
+        value = _join(base_url, value)
+    return _IMG_TMPL.format(_escape(str(value)))
+
+
+# Field-specific cell renderers; other fields use _render_value
+_FIELD_RENDERERS = {
+    'courseURL': _render_course_link,
+    'imageUrl': _render_image,
+}
+
+
 def _build_table_html(courses_data: List[Dict[str, Any]], base_url: str) -> str:
     """
     Build an HTML table from course data.
@@ -91,75 +259,99 @@ def _build_table_html(courses_data: List[Dict[str, Any]], base_url: str) -> str:
     if not courses_data:
         return "<p>No course data available.</p>"
     
-    # Modify course URLs to create clickable links
-    for course in courses_data:
-        if course.get('courseURL'):
-            course['courseURL'] = (
-                f'<a href="{base_url}{course["courseURL"]}" target="_blank">'
-                f'{course["title"]}</a>'
-            )
-    
-    # Build table structure
-    headers = courses_data[0].keys()
-    table_html_parts = [
-        '<table style="border-collapse: collapse; width: 100%;">',
-        '<thead><tr>'
-    ]
-    
-    # Add headers
+    # Build table structure and header row
+    headers = list(courses_data[0].keys())
+    parts = [_TABLE_OPEN]
     for header in headers:
-        table_html_parts.append(
-            f'<th style="border: 1px solid #dddddd; text-align: left; padding: 8px;">'
-            f'{header}</th>'
-        )
+        parts.extend((_TH_OPEN, _escape(header), _TH_CLOSE))
+    parts.append(_HEAD_CLOSE)
     
-    table_html_parts.append('</tr></thead><tbody>')
+    # Resolve each column's renderer once rather than per cell
+    columns = [
+        (header, _FIELD_RENDERERS.get(header, _render_value)) for header in headers
+    ]
     
     # Add rows
     for course in courses_data:
-        table_html_parts.append('<tr>')
-        for header in headers:
-            value = course[header]
-            
-            # Handle different value types
-            if header == "imageUrl":
-                value = (
-                    f'<img src="{value}" alt="Course Image" '
-                    f'style="max-width:100px; height:auto;">'
-                )
-            elif isinstance(value, list):
-                value = ', '.join(str(item) for item in value)
-            
-            table_html_parts.append(
-                f'<td style="border: 1px solid #dddddd; text-align: left; padding: 8px;">'
-                f'{value}</td>'
-            )
-        table_html_parts.append('</tr>')
-    
-    table_html_parts.append('</tbody></table>')
-    return ''.join(table_html_parts)
-
-
-def _create_screenshot_html(screenshot: bytes) -> str:
+        parts.append(_TR_OPEN)
+        for header, render in columns:
+            parts.extend((_TD_OPEN, render(course[header], course, base_url), _TD_CLOSE))
+        parts.append(_TR_CLOSE)
+    
+    parts.append(_TABLE_CLOSE)
+    return ''.join(parts)
+
+
+_SCREENSHOT_PREFIX = b'<img src="data:'
+_SCREENSHOT_BASE64 = b';base64,'
+_SCREENSHOT_SUFFIX = b'" alt="Website Screenshot" style="max-width:100%; height:auto;">'
+_JPEG_MAGIC = b'\xff\xd8\xff'
+
+# Screenshots may be passed as any bytes-like buffer, e.g. BytesIO.getbuffer()
+ImageBytes = Union[bytes, bytearray, memoryview]
+
+# Rendered screenshot tags keyed by (content digest, mime). Entries are
+# multi-MB strings, so only a few recent screenshots are kept.
+_SCREENSHOT_CACHE_SIZE = 8
+_SCREENSHOT_HTML_CACHE: "OrderedDict[Tuple[bytes, str], str]" = OrderedDict()
+
+
+def _detect_image_mime(image: ImageBytes) -> str:
+    """
+    Guess the MIME type of screenshot bytes from their signature.
+    
+    Args:
+        image: Image data as a bytes-like object.
+    
+    Returns:
+        str: "image/jpeg" for JPEG data, otherwise "image/png".
+    """
+    if image[:3] == _JPEG_MAGIC:
+        return "image/jpeg"
+    return "image/png"
+
+
+def _create_screenshot_html(screenshot: ImageBytes, mime: Optional[str] = None) -> str:
     """
     Convert screenshot bytes to base64-encoded HTML image tag.
     
     Args:
-        screenshot: Screenshot image as bytes.
+        screenshot: Screenshot image as a bytes-like object; a memoryview
+            is encoded in place without being copied to bytes first.
+        mime: Image MIME type; detected from the bytes when omitted.
     
     Returns:
         str: HTML img tag with base64-encoded image.
     """
-    img_b64 = base64.b64encode(screenshot).decode('utf-8')
-    return (
-        f'<img src="data:image/png;base64,{img_b64}" '
-        f'alt="Website Screenshot" style="max-width:100%; height:auto;">'
-    )
+    mime = mime or _detect_image_mime(screenshot)
+    
+    # Re-rendering the same screenshot (e.g. re-running a cell) reuses the
+    # encoded tag; hashing is much cheaper than base64 plus the copy
+    key = (hashlib.blake2b(screenshot, digest_size=16).digest(), mime)
+    cached = _SCREENSHOT_HTML_CACHE.get(key)
+    if cached is not None:
+        _SCREENSHOT_HTML_CACHE.move_to_end(key)
+        return cached
+    
+    # Join as bytes and decode once so the base64 payload is copied a
+    # single time instead of via decode() plus string formatting.
+    screenshot_html = b''.join((
+        _SCREENSHOT_PREFIX,
+        mime.encode('ascii'),
+        _SCREENSHOT_BASE64,
+        binascii.b2a_base64(screenshot, newline=False),
+        _SCREENSHOT_SUFFIX,
+    )).decode('ascii')
+    
+    _SCREENSHOT_HTML_CACHE[key] = screenshot_html
+    if len(_SCREENSHOT_HTML_CACHE) > _SCREENSHOT_CACHE_SIZE:
+        _SCREENSHOT_HTML_CACHE.popitem(last=False)
+    return screenshot_html
 
 
 async def visualize_courses(
     result: Any,
-    screenshot: bytes,
+    screenshot: ImageBytes,
     target_url: str,
     instructions: str,
     base_url: str
@@ -169,22 +361,28 @@ async def visualize_courses(
     
     Args:
         result: Course data result object with a 'courses' attribute.
-        screenshot: Screenshot image as bytes.
+        screenshot: Screenshot image as a bytes-like object.
         target_url: Target URL that was scraped.
         instructions: Scraping instructions used.
         base_url: Base URL for constructing full course URLs.
     """
+    from IPython.display import display, HTML, Markdown
+    
     if not result:
         display(Markdown("### No results available"))
         return
     
-    # Convert courses to dictionaries
-    courses_data = [course.model_dump() for course in result.courses]
-    
-    # Display course data table
-    display(Markdown("### Scraped Course Data:"))
-    table_html = _build_table_html(courses_data, base_url)
-    display(HTML(table_html))
+    if not result.courses:
+        # Nothing to tabulate; skip serialization and table building
+        display(Markdown("### No course data available"))
+    else:
+        # Convert courses to dictionaries
+        courses_data = _COURSES_ADAPTER.dump_python(result.courses)
+        
+        # Display course data table
+        display(Markdown("### Scraped Course Data:"))
+        table_html = _build_table_html(courses_data, base_url)
+        display(HTML(table_html))
     
     # Display screenshot
     display(Markdown("### Website Screenshot:"))
@@ -1,11 +1,24 @@
 """
 LLM processing functionality for structured data extraction.
 """
+import asyncio
+import weakref
+import httpx
 from openai import AsyncOpenAI
-from config import DEFAULT_MODEL, MAX_HTML_TOKENS
-from helpers import get_openai_api_key
-from typing import Optional, Type, TypeVar
+from config import (
+    DEFAULT_MODEL,
+    MAX_HTML_TOKENS,
+    HTML_STRIP_TAGS,
+    LLM_HTTP_TIMEOUT,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS,
+)
+from helpers import LoopLocalClient, get_openai_api_key
+from typing import Dict, Optional, Tuple, Type, TypeVar
 from pydantic import BaseModel
+from selectolax.lexbor import LexborHTMLParser
+import functools
+import re
 import tiktoken
 import logging
 
@@ -14,14 +27,148 @@ T = TypeVar('T', bound=BaseModel)
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_SYSTEM_PROMPT_TEMPLATE = (
+    "You are an expert web scraping agent.\n"
+    "Extract relevant information from the provided HTML content "
+    "following these instructions:\n"
+    "\n"
+    "{instructions}\n"
+    "\n"
+    "Return the data in the specified JSON format. Be thorough and accurate."
+)
+
+
+@functools.lru_cache(maxsize=16)
+def _build_system_prompt(instructions: str) -> str:
+    """
+    Build the system prompt for a set of instructions.
+    
+    Args:
+        instructions: Processing instructions for the LLM
+        
+    Returns:
+        str: The formatted system prompt
+    """
+    return _SYSTEM_PROMPT_TEMPLATE.format(instructions=instructions)
+
+
+# HTTP/2 connection pool for OpenAI requests, one per event loop
+_HTTP_CLIENT = LoopLocalClient(
+    http2=True,
+    limits=httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+    ),
+    timeout=LLM_HTTP_TIMEOUT,
+)
+# AsyncOpenAI clients by API key per event loop, with the pool they wrap
+_OpenAIClients = Tuple[httpx.AsyncClient, Dict[Optional[str], AsyncOpenAI]]
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _OpenAIClients]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_async_client(api_key: Optional[str]) -> AsyncOpenAI:
+    """
+    Return the running loop's shared AsyncOpenAI client for an API key.
+    
+    Args:
+        api_key: The OpenAI API key
+        
+    Returns:
+        AsyncOpenAI: Client backed by the loop's HTTP/2 connection pool
+    """
+    http_client = _HTTP_CLIENT.get()
+    loop = asyncio.get_running_loop()
+    entry = _ASYNC_CLIENTS.get(loop)
+    if entry is None or entry[0] is not http_client:
+        # Clients wrapping a closed connection pool can't be reused
+        entry = _ASYNC_CLIENTS[loop] = (http_client, {})
+    clients = entry[1]
+    client = clients.get(api_key)
+    if client is None:
+        client = clients[api_key] = AsyncOpenAI(api_key=api_key, http_client=http_client)
+    return client
+
+
+async def close_shared_clients() -> None:
+    """Close the running loop's HTTP connection pool and drop its clients."""
+    _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if await _HTTP_CLIENT.close():
+        logger.info("Closed shared OpenAI HTTP client")
+
 
 class LLMProcessor:
     """Handles LLM-based processing of HTML content."""
     
     def __init__(self, api_key: Optional[str] = None):
-        """Initialize the OpenAI async client."""
-        self.client = AsyncOpenAI(api_key=api_key or get_openai_api_key())
-        logger.info("LLMProcessor initialized with AsyncOpenAI client")
+        """
+        Initialize the processor; the OpenAI client is shared per event loop.
+        
+        Raises:
+            ValueError: If no API key is given or found in the environment
+        """
+        self._api_key = api_key or get_openai_api_key()
+        if not self._api_key:
+            # Fail before any browser work rather than at the first LLM call
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+        self._encoding = self._get_encoding(DEFAULT_MODEL)
+        logger.info("LLMProcessor initialized")
+    
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The shared AsyncOpenAI client for the running event loop."""
+        return _get_async_client(self._api_key)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
+    def _load_encoding(model: str) -> Optional[tiktoken.Encoding]:
+        """
+        Return the (cached) tiktoken encoding for a model.
+        
+        An unknown model is cached as None. Errors loading the BPE file
+        (e.g. a failed download) propagate and aren't cached, so the next
+        lookup retries.
+        
+        Args:
+            model: The model to get the encoding for
+            
+        Returns:
+            Optional[tiktoken.Encoding]: The encoding object, or None for unknown models
+        """
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            logger.warning("No tiktoken encoding known for %s. Falling back to character estimate.", model)
+            return None
+    
+    @staticmethod
+    def _get_encoding(model: str) -> Optional[tiktoken.Encoding]:
+        """
+        Return the tiktoken encoding for a model, or None if unavailable.
+        
+        Args:
+            model: The model to get the encoding for
+            
+        Returns:
+            Optional[tiktoken.Encoding]: The encoding object, or None if it couldn't be loaded now
+        """
+        try:
+            return LLMProcessor._load_encoding(model)
+        except Exception as e:
+            logger.warning("Failed to load tiktoken encoding for %s: %s. Will retry on next use.", model, e)
+            return None
+    
+    def _encoding_for(self, model: str) -> Optional[tiktoken.Encoding]:
+        """Return the encoding for a model, skipping the cache for the default model."""
+        if model == DEFAULT_MODEL:
+            if self._encoding is None:
+                # Retry loads that failed earlier; unknown models are cached
+                self._encoding = self._get_encoding(model)
+            return self._encoding
+        return self._get_encoding(model)
     
     def _count_tokens(self, text: str, model: str = DEFAULT_MODEL) -> int:
         """
@@ -34,13 +181,30 @@ class LLMProcessor:
         Returns:
             int: Number of tokens
         """
-        try:
-            encoding = tiktoken.encoding_for_model(model)
-            return len(encoding.encode(text))
-        except Exception as e:
-            logger.warning(f"Failed to count tokens with tiktoken: {e}. Falling back to character estimate.")
+        encoding = self._encoding_for(model)
+        if encoding is None:
             # Fallback: rough estimate of 4 characters per token
-            return len(text) // 4
+            return len(text) >> 2
+        return len(encoding.encode(text))
+    
+    def _clean_html(self, html: str) -> str:
+        """
+        Strip non-content markup from HTML before tokenization.
+        
+        Removes the tags listed in HTML_STRIP_TAGS and collapses runs of
+        whitespace.
+        
+        Args:
+            html: The raw HTML content
+            
+        Returns:
+            str: The cleaned HTML
+        """
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(list(HTML_STRIP_TAGS))
+        cleaned = _WHITESPACE_RE.sub(" ", tree.html or "")
+        logger.info("Cleaned HTML from %d to %d characters", len(html), len(cleaned))
+        return cleaned
     
     def _truncate_html(self, html: str, max_tokens: int, model: str = DEFAULT_MODEL) -> str:
         """
@@ -54,21 +218,33 @@ class LLMProcessor:
         Returns:
             str: Truncated HTML
         """
-        token_count = self._count_tokens(html, model)
+        # Every token covers at least one UTF-8 byte, so text whose byte
+        # length is within the limit can't exceed it; skip tokenizing.
+        if len(html) <= max_tokens and (len(html) * 4 <= max_tokens or html.isascii()):
+            logger.info("HTML is %d characters, within limit of %d tokens", len(html), max_tokens)
+            return html
+        
+        encoding = self._encoding_for(model)
+        if encoding is None:
+            # Without a tokenizer, estimate 4 characters per token
+            if len(html) >> 2 <= max_tokens:
+                return html
+            logger.warning("HTML is ~%d tokens (estimated), truncating to %d", len(html) >> 2, max_tokens)
+            return html[:max_tokens << 2]
+        
+        tokens = encoding.encode(html)
+        token_count = len(tokens)
         
         if token_count <= max_tokens:
-            logger.info(f"HTML is {token_count} tokens, within limit of {max_tokens}")
+            logger.info("HTML is %d tokens, within limit of %d", token_count, max_tokens)
             return html
         
-        logger.warning(f"HTML has {token_count} tokens, truncating to {max_tokens}")
+        logger.warning("HTML has %d tokens, truncating to %d", token_count, max_tokens)
         
-        # Binary search to find the right length
-        encoding = tiktoken.encoding_for_model(model)
-        tokens = encoding.encode(html)
         truncated_tokens = tokens[:max_tokens]
         truncated_html = encoding.decode(truncated_tokens)
         
-        logger.info(f"Truncated HTML to {len(truncated_tokens)} tokens")
+        logger.info("Truncated HTML to %d tokens", len(truncated_tokens))
         return truncated_html
     
     async def process_html_to_structured_data(
@@ -97,20 +273,16 @@ class LLMProcessor:
             Exception: If LLM processing fails
         """
         try:
-            logger.info(f"Processing HTML with instructions: {instructions[:100]}...")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Processing HTML with instructions: %s...", instructions[:100])
             
-            # Truncate HTML properly using token counting
-            truncated_html = self._truncate_html(html, max_tokens, model)
+            # Drop scripts/styles etc., then truncate using token counting
+            cleaned_html = self._clean_html(html)
+            truncated_html = self._truncate_html(cleaned_html, max_tokens, model)
             
-            # Build a generic system prompt
-            system_content = f"""You are an expert web scraping agent. 
-Extract relevant information from the provided HTML content following these instructions:
-
-{instructions}
-
-Return the data in the specified JSON format. Be thorough and accurate."""
+            system_content = _build_system_prompt(instructions)
             
-            logger.info(f"Sending request to OpenAI API with model {model}")
+            logger.info("Sending request to OpenAI API with model %s", model)
             
             completion = await self.client.beta.chat.completions.parse(
                 model=model,
@@ -132,5 +304,5 @@ Return the data in the specified JSON format. Be thorough and accurate."""
             return completion.choices[0].message.parsed
             
         except Exception as e:
-            logger.error(f"LLM processing failed: {str(e)}", exc_info=True)
+            logger.error("LLM processing failed: %s", e, exc_info=True)
             raise
\ No newline at end of file
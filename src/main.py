@@ -4,7 +4,10 @@ Main application entry point for the web scraping application.
 import asyncio
 from scraping_service import ScrapingService
 from models import DeeplearningCourseList
-from helpers import visualizeCourses
+from helpers import visualize_courses
+from llm_processor import close_shared_clients
+from browser_pool import browser_pool
+from web_scraper import close_fetch_client
 from config import TARGET_URL, BASE_URL, DEFAULT_INSTRUCTIONS
 import logging
 
@@ -16,20 +19,23 @@ async def main():
     try:
         logger.info("Starting web scraping application")
         
-        # Initialize the scraping service
-        service = ScrapingService()
+        # Launch a browser before the first scrape needs one; main only
+        # scrapes a single URL, so there is no point warming the whole pool
+        await browser_pool.warm_up(1)
         
-        # Run the scraping and processing with the response model
-        result, screenshot = await service.scrape_and_process(
-            TARGET_URL, 
-            DEFAULT_INSTRUCTIONS,
-            DeeplearningCourseList  # Pass the model class
-        )
+        # Initialize the scraping service with a shared browser
+        async with ScrapingService() as service:
+            # Run the scraping and processing with the response model
+            result, screenshot = await service.scrape_and_process(
+                TARGET_URL, 
+                DEFAULT_INSTRUCTIONS,
+                DeeplearningCourseList  # Pass the model class
+            )
         
         # Visualize results if available
         if result and screenshot:
             logger.info("Visualizing results")
-            await visualizeCourses(
+            await visualize_courses(
                 result=result,
                 screenshot=screenshot,
                 target_url=TARGET_URL,
@@ -41,8 +47,12 @@ async def main():
             print("❌ No results to display")
             
     except Exception as e:
-        logger.error(f"Application error: {str(e)}", exc_info=True)
+        logger.error("Application error: %s", e, exc_info=True)
         print(f"❌ Application error: {str(e)}")
+    finally:
+        await browser_pool.close()
+        await close_shared_clients()
+        await close_fetch_client()
 
 
 if __name__ == "__main__":
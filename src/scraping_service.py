@@ -3,8 +3,10 @@ Main scraping service that orchestrates web scraping and LLM processing.
 """
 import asyncio
 from typing import Tuple, Optional, Type, TypeVar
+from playwright.async_api import Page
 from web_scraper import WebScraperAgent
 from llm_processor import LLMProcessor
+from config import MAX_CONCURRENT_PAGES
 from pydantic import BaseModel
 import logging
 
@@ -15,13 +17,41 @@ logger = logging.getLogger(__name__)
 
 
 class ScrapingService:
-    """Main service for orchestrating web scraping and data processing."""
+    """
+    Main service for orchestrating web scraping and data processing.
+    
+    Used as an async context manager, the service holds one browser context
+    across calls and opens a fresh page per scrape; otherwise each call
+    borrows a browser from the shared pool for its duration.
+    """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: int = MAX_CONCURRENT_PAGES):
         """Initialize the scraping service."""
         self.llm_processor = LLMProcessor(api_key)
+        self._scraper: Optional[WebScraperAgent] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
         logger.info("ScrapingService initialized")
     
+    async def __aenter__(self):
+        """Start a long-lived browser shared by all scrapes."""
+        # Keep assets loaded: every scrape is followed by a screenshot
+        scraper = WebScraperAgent(block_assets=False)
+        try:
+            await scraper.preconnect()
+        except Exception:
+            # __aexit__ isn't called when __aenter__ raises; don't leak the
+            # browser or its pool slot
+            await scraper.close()
+            raise
+        self._scraper = scraper
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Close the shared browser."""
+        if self._scraper:
+            await self._scraper.close()
+            self._scraper = None
+    
     async def scrape_and_process(
         self, 
         target_url: str, 
@@ -42,38 +72,79 @@ class ScrapingService:
         Raises:
             Exception: Re-raises any exceptions that occur during scraping or processing
         """
-        result = None
-        screenshot = None
-        
-        logger.info(f"Starting scrape and process for URL: {target_url}")
+        logger.info("Starting scrape and process for URL: %s", target_url)
         
         try:
-            async with WebScraperAgent() as scraper:
-                # Scrape content and capture screenshot
-                logger.info("Extracting HTML content")
-                print("Extracting HTML Content \n")
-                html_content = await scraper.scrape_content(target_url)
-                logger.info(f"Successfully extracted {len(html_content)} characters of HTML")
-
-                logger.info("Taking screenshot")
-                print("Taking Screenshot \n")
-                screenshot = await scraper.screenshot_buffer()
-                logger.info(f"Screenshot captured: {len(screenshot)} bytes")
-
-                # Process content with LLM
-                logger.info("Processing HTML with LLM")
-                print("Processing with LLM...")
-                result = await self.llm_processor.process_html_to_structured_data(
-                    html_content, instructions, response_model
-                )
-                logger.info("Successfully generated structured response")
-                print("\nGenerated Structured Response")
+            if self._scraper is None:
+                async with WebScraperAgent(block_assets=False) as scraper:
+                    return await self._scrape_page(
+                        scraper, None, target_url, instructions, response_model
+                    )
+            
+            # Cap the number of pages open at once on the shared browser
+            async with self._semaphore:
+                async with self._scraper.new_page() as page:
+                    return await self._scrape_page(
+                        self._scraper, page, target_url, instructions, response_model
+                    )
                 
         except Exception as e:
-            logger.error(f"Scraping and processing failed: {str(e)}", exc_info=True)
+            logger.error("Scraping and processing failed: %s", e, exc_info=True)
             print(f"❌ Error: {str(e)}")
             # Re-raise the exception so calling code can handle it appropriately
             raise
+    
+    async def _scrape_page(
+        self,
+        scraper: WebScraperAgent,
+        page: Optional[Page],
+        target_url: str,
+        instructions: str,
+        response_model: Type[T]
+    ) -> Tuple[Optional[T], Optional[bytes]]:
+        """
+        Scrape, screenshot and process a single URL on the given page.
+        
+        Args:
+            scraper: The scraper agent to use
+            page: Page to scrape with, or None for the agent's own page
+            target_url: The URL to scrape
+            instructions: Instructions for the LLM processing
+            response_model: Pydantic model class defining expected response structure
+            
+        Returns:
+            Tuple of (processed_data, screenshot_bytes)
+        """
+        # Scrape content and capture screenshot
+        logger.info("Extracting HTML content")
+        print("Extracting HTML Content \n")
+        # Always navigate: the screenshot below needs the rendered page
+        html_content = await scraper.scrape_content(
+            target_url, page, force_refresh=True, force_js=True
+        )
+        logger.info("Successfully extracted %d characters of HTML", len(html_content))
+
+        # The page is already loaded, so capture the screenshot while
+        # the (much slower) LLM request is in flight
+        logger.info("Taking screenshot and processing HTML with LLM")
+        print("Taking Screenshot \n")
+        print("Processing with LLM...")
+        llm_task = asyncio.create_task(
+            self.llm_processor.process_html_to_structured_data(
+                html_content, instructions, response_model
+            )
+        )
+        screenshot_task = asyncio.create_task(scraper.screenshot_buffer(page))
+        try:
+            result, screenshot = await asyncio.gather(llm_task, screenshot_task)
+        except Exception:
+            # Don't leave the other task running once the page closes
+            llm_task.cancel()
+            screenshot_task.cancel()
+            raise
+        logger.info("Screenshot captured: %d bytes", len(screenshot))
+        logger.info("Successfully generated structured response")
+        print("\nGenerated Structured Response")
         
         return result, screenshot
 
@@ -2,68 +2,379 @@
 Web scraping functionality using Playwright.
 """
 import asyncio
-from playwright.async_api import async_playwright
-from typing import Optional
-from config import BROWSER_ARGS, PAGE_WAIT_TIMEOUT
+import io
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import httpx
+from playwright.async_api import Page, Route
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from typing import AsyncIterator, List, Optional, Tuple, Union
+from browser_pool import browser_pool
+from helpers import LoopLocalClient
+from config import (
+    BROWSER_ARGS,
+    BROWSER_PROFILE_DIR,
+    NAVIGATION_WAIT_UNTIL,
+    NAVIGATION_TIMEOUT,
+    PAGE_WAIT_TIMEOUT,
+    SCREENSHOT_FORMAT,
+    SCREENSHOT_QUALITY,
+    SCREENSHOT_CACHE_MAX_ENTRIES,
+    MAX_CONCURRENT_PAGES,
+    CONTENT_CACHE_TTL,
+    CONTENT_CACHE_MAX_ENTRIES,
+    BLOCKED_RESOURCE_TYPES,
+    FETCH_TIMEOUT,
+    FETCH_MIN_HTML_LENGTH,
+    FETCH_USER_AGENT,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Cheap fingerprint of what a viewport screenshot would show
+_PAGE_FINGERPRINT_JS = (
+    "() => [location.href, document.title, window.scrollY,"
+    " document.body ? document.body.innerText.length : 0].join('|')"
+)
+
+
+# Browserless fetch client, one per event loop
+_FETCH_CLIENT = LoopLocalClient(
+    http2=True,
+    timeout=FETCH_TIMEOUT,
+    follow_redirects=True,
+    headers={"User-Agent": FETCH_USER_AGENT},
+)
+
+
+def _get_fetch_client() -> httpx.AsyncClient:
+    """Return the running loop's shared HTTP/2 client for browserless fetches."""
+    return _FETCH_CLIENT.get()
+
+
+async def close_fetch_client() -> None:
+    """Close the running loop's shared fetch client."""
+    if await _FETCH_CLIENT.close():
+        logger.info("Closed shared fetch client")
+
+
+async def _fetch_static(url: str) -> Optional[str]:
+    """
+    Fetch a page over plain HTTP, without a browser.
+    
+    Args:
+        url: The URL to fetch
+        
+    Returns:
+        The HTML if it looks complete without JavaScript, otherwise None
+    """
+    try:
+        response = await _get_fetch_client().get(url)
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
+        logger.info("HTTP fetch of %s failed (%s), using browser", url, e)
+        return None
+    
+    text = response.text
+    if (
+        response.status_code < 400
+        and len(text) > FETCH_MIN_HTML_LENGTH
+        and "<noscript" not in text
+    ):
+        return text
+    logger.info("HTTP fetch of %s needs JavaScript rendering, using browser", url)
+    return None
+
 
 class WebScraperAgent:
     """Asynchronous web scraper using Playwright."""
     
-    def __init__(self):
-        self.playwright = None
+    # Scraped HTML keyed by URL, shared by all agents: url -> (fetched_at, html)
+    _content_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+    
+    def __init__(self, block_assets: bool = True, persistent_profile: bool = False):
+        """
+        Create a scraper agent.
+        
+        Args:
+            block_assets: Abort image/media/font requests to speed up HTML
+                scraping; disable when the page will be screenshotted
+            persistent_profile: Run a dedicated browser on the on-disk profile
+                in BROWSER_PROFILE_DIR instead of a pooled one, so the HTTP
+                cache survives restarts. Only one such agent can run at a time.
+        """
+        self.block_assets = block_assets
+        self.persistent_profile = persistent_profile
         self.browser = None
+        self.context = None
         self.page = None
+        # Screenshot bytes keyed by (page fingerprint, fmt, quality)
+        self._shot_cache: "OrderedDict[Tuple[str, str, int], bytes]" = OrderedDict()
         logger.info("WebScraperAgent instance created")
 
+    @staticmethod
+    async def _route_request(route: Route) -> None:
+        """Abort requests for asset types the HTML scrape doesn't need."""
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def _is_connected(self) -> bool:
+        """Whether the agent has a live browser context to open pages in."""
+        if self.context is None:
+            return False
+        # Persistent contexts have no separate Browser object; their context
+        # is reset by _on_context_close when it or its browser goes away
+        return self.persistent_profile or self.browser.is_connected()
+
+    def _on_context_close(self, context) -> None:
+        """Forget a persistent context once it closes so it gets relaunched."""
+        if self.context is context:
+            logger.warning("Persistent browser context closed")
+            self.context = None
+            self.page = None
+
     async def init_browser(self):
-        """Initialize the browser with optimized settings."""
+        """
+        Take a warm browser from the shared pool and open a page on it.
+        
+        All pages of the agent live in one browser context, so they share
+        the HTTP cache and cookie jar across scrapes. With persistent_profile
+        the context is launched on the on-disk profile instead.
+        """
         try:
-            logger.info("Initializing Playwright browser")
-            self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(
-                headless=True,
-                args=BROWSER_ARGS
-            )
-            self.page = await self.browser.new_page()
+            if self.persistent_profile:
+                fresh = self.context is None
+                if fresh:
+                    logger.info("Launching browser with profile %s", BROWSER_PROFILE_DIR)
+                    playwright = await browser_pool.get_playwright()
+                    self.context = await playwright.chromium.launch_persistent_context(
+                        BROWSER_PROFILE_DIR,
+                        headless=True,
+                        args=BROWSER_ARGS
+                    )
+                    self.context.on("close", self._on_context_close)
+            else:
+                if not self.browser or not self.browser.is_connected():
+                    if self.browser:
+                        # Give back the crashed browser's pool slot
+                        await browser_pool.release(self.browser)
+                        self.browser = None
+                    logger.info("Acquiring browser from pool")
+                    self.browser = await browser_pool.acquire()
+                    self.context = None
+                fresh = self.context is None
+                if fresh:
+                    self.context = await self.browser.new_context()
+            
+            if fresh and self.block_assets:
+                await self.context.route("**/*", self._route_request)
+            if fresh and self.context.pages:
+                # A persistent context starts with a blank page; use it
+                self.page = self.context.pages[0]
+            else:
+                self.page = await self.context.new_page()
             logger.info("Browser initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize browser: {str(e)}", exc_info=True)
+            logger.error("Failed to initialize browser: %s", e, exc_info=True)
             raise
 
-    async def scrape_content(self, url: str) -> str:
+    async def preconnect(self) -> None:
+        """
+        Initialize the browser and load a blank page ahead of the first scrape.
+        
+        Gets browser launch and renderer start-up out of the way so the
+        first real navigation doesn't pay for them.
+        """
+        await self.init_browser()
+        await self.page.goto("about:blank")
+        logger.info("Browser preconnected")
+
+    @asynccontextmanager
+    async def new_page(self) -> AsyncIterator[Page]:
+        """
+        Open an extra page in the agent's shared browser context.
+        
+        Pages are cheap compared to contexts and reuse the context's HTTP
+        cache and cookies; the page is closed on exit.
+        
+        Yields:
+            Page: A new page in the shared context
+        """
+        if not self._is_connected():
+            logger.warning("Browser not initialized or disconnected, reinitializing browser")
+            await self.init_browser()
+        
+        page = await self.context.new_page()
+        try:
+            yield page
+        finally:
+            await page.close()
+
+    async def scrape_content(
+        self,
+        url: str,
+        page: Optional[Page] = None,
+        force_refresh: bool = False,
+        force_js: bool = False
+    ) -> str:
         """
         Scrape HTML content from a given URL.
         
+        Content fetched within the last CONTENT_CACHE_TTL seconds is served
+        from cache without navigating. Otherwise a plain HTTP fetch is tried
+        first and the browser is only used when the page seems to need
+        JavaScript. Neither a cache hit nor an HTTP fetch moves the page, so
+        callers that screenshot the page afterwards should pass
+        force_refresh=True and force_js=True.
+        
+        A navigation that commits but doesn't finish within
+        NAVIGATION_TIMEOUT returns the partial DOM (uncached).
+        
         Args:
             url: The URL to scrape
+            page: Page to scrape with; defaults to the agent's own page
+            force_refresh: Bypass the cache and always fetch
+            force_js: Skip the HTTP fetch and always render in the browser
             
         Returns:
             str: The HTML content of the page
             
         Raises:
+            PlaywrightTimeoutError: If the navigation doesn't commit in time
             Exception: If navigation or scraping fails
         """
-        if not self.page or self.page.is_closed():
-            logger.warning("Page not initialized or closed, reinitializing browser")
-            await self.init_browser()
+        content = await self._cached_or_static(url, force_refresh, force_js)
+        if content is not None:
+            return content
         
+        if page is None:
+            if not self.page or self.page.is_closed():
+                logger.warning("Page not initialized or closed, reinitializing browser")
+                await self.init_browser()
+            page = self.page
+        return await self._render(url, page)
+
+    async def _cached_or_static(
+        self,
+        url: str,
+        force_refresh: bool = False,
+        force_js: bool = False
+    ) -> Optional[str]:
+        """
+        Get a URL's content without a browser, from cache or a plain HTTP fetch.
+        
+        Returns:
+            The HTML content, or None if the page has to be rendered
+        """
+        if not force_refresh:
+            entry = self._content_cache.get(url)
+            if entry and time.monotonic() - entry[0] < CONTENT_CACHE_TTL:
+                self._content_cache.move_to_end(url)
+                logger.info("Serving cached content for %s", url)
+                return entry[1]
+        
+        if not force_js:
+            content = await _fetch_static(url)
+            if content is not None:
+                logger.info("Fetched %d characters from %s without a browser", len(content), url)
+                self._cache_content(url, content)
+                return content
+        return None
+
+    async def _render(self, url: str, page: Page) -> str:
+        """Navigate page to url and return its DOM, caching complete loads."""
         try:
-            logger.info(f"Navigating to {url}")
-            await self.page.goto(url, wait_until="load", timeout=30000)
-            logger.info(f"Waiting {PAGE_WAIT_TIMEOUT}ms for dynamic content")
-            await self.page.wait_for_timeout(PAGE_WAIT_TIMEOUT)
+            logger.info("Navigating to %s", url)
+            started = time.monotonic()
+            # Wait for the new document to commit first; until then the page
+            # still shows the previous document, so a timeout here raises
+            await page.goto(url, wait_until="commit", timeout=NAVIGATION_TIMEOUT)
+            remaining = NAVIGATION_TIMEOUT - (time.monotonic() - started) * 1000
+            try:
+                # Playwright treats a timeout of 0 as "no timeout"
+                await page.wait_for_load_state(NAVIGATION_WAIT_UNTIL, timeout=max(remaining, 1))
+                complete = True
+            except PlaywrightTimeoutError:
+                # Slow pages usually have a usable DOM well before the
+                # navigation finishes; scrape what is there
+                logger.warning("Navigation to %s exceeded %dms, capturing partial DOM", url, NAVIGATION_TIMEOUT)
+                complete = False
+            
+            if complete:
+                logger.info("Waiting up to %dms for network to settle", PAGE_WAIT_TIMEOUT)
+                try:
+                    await page.wait_for_load_state("networkidle", timeout=PAGE_WAIT_TIMEOUT)
+                except PlaywrightTimeoutError:
+                    # Pages with long-polling never go idle; use what has loaded
+                    logger.info("Network still busy after %dms, continuing", PAGE_WAIT_TIMEOUT)
             
-            content = await self.page.content()
-            logger.info(f"Successfully scraped {len(content)} characters from {url}")
+            content = await page.content()
+            logger.info("Successfully scraped %d characters from %s", len(content), url)
+            # Don't cache a partial DOM; the next scrape should try again
+            if complete:
+                self._cache_content(url, content)
             return content
         except Exception as e:
-            logger.error(f"Failed to scrape content from {url}: {str(e)}", exc_info=True)
+            logger.error("Failed to scrape content from %s: %s", url, e, exc_info=True)
             raise
 
+    @classmethod
+    def _cache_content(cls, url: str, content: str) -> None:
+        """Store scraped content, evicting the least recently used entries."""
+        cls._content_cache[url] = (time.monotonic(), content)
+        cls._content_cache.move_to_end(url)
+        while len(cls._content_cache) > CONTENT_CACHE_MAX_ENTRIES:
+            cls._content_cache.popitem(last=False)
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Drop all cached page content."""
+        cls._content_cache.clear()
+
+    async def scrape_batch(
+        self,
+        urls: List[str],
+        max_concurrency: int = MAX_CONCURRENT_PAGES
+    ) -> List[Union[str, BaseException]]:
+        """
+        Scrape several URLs concurrently on the shared browser.
+        
+        URLs served from cache or the HTTP fast path never open a page; the
+        rest each get their own page in the shared context, with at most
+        max_concurrency pages open at once.
+        
+        Args:
+            urls: The URLs to scrape
+            max_concurrency: Maximum number of pages rendering in parallel
+            
+        Returns:
+            List of HTML strings in the same order as urls; a failed URL
+            yields its exception instead of raising
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        # Launch lazily, once, so a fully cached batch starts no browser and
+        # concurrent pages don't each start one
+        launch_lock = asyncio.Lock()
+        
+        async def _scrape_one(url: str) -> str:
+            content = await self._cached_or_static(url)
+            if content is not None:
+                return content
+            async with semaphore:
+                async with launch_lock:
+                    if not self._is_connected():
+                        await self.init_browser()
+                async with self.new_page() as page:
+                    return await self._render(url, page)
+        
+        logger.info("Scraping batch of %d URLs with concurrency %d", len(urls), max_concurrency)
+        return await asyncio.gather(
+            *(_scrape_one(url) for url in urls), return_exceptions=True
+        )
+
     async def take_screenshot(self, path: str = "screenshot.png") -> str:
         """
         Take a full-page screenshot and save to file.
@@ -75,46 +386,111 @@ class WebScraperAgent:
             str: The path where the screenshot was saved
         """
         try:
-            logger.info(f"Taking screenshot and saving to {path}")
+            logger.info("Taking screenshot and saving to %s", path)
             await self.page.screenshot(path=path, full_page=True)
-            logger.info(f"Screenshot saved to {path}")
+            logger.info("Screenshot saved to %s", path)
             return path
         except Exception as e:
-            logger.error(f"Failed to take screenshot: {str(e)}", exc_info=True)
+            logger.error("Failed to take screenshot: %s", e, exc_info=True)
             raise
 
-    async def screenshot_buffer(self) -> bytes:
+    async def screenshot_buffer(
+        self,
+        page: Optional[Page] = None,
+        fmt: str = SCREENSHOT_FORMAT,
+        quality: int = SCREENSHOT_QUALITY,
+        use_cache: bool = False
+    ) -> bytes:
         """
-        Take a screenshot and return as bytes buffer.
+        Take a screenshot of the viewport and return as bytes buffer.
+        
+        With use_cache, a page whose URL, title, scroll position and text
+        length match an earlier capture gets the cached bytes without
+        rasterizing. The fingerprint doesn't see images, styling or layout,
+        so only enable it where a stale capture of a visually changed page
+        is acceptable.
+        
+        Args:
+            page: Page to capture; defaults to the agent's own page
+            fmt: Image format, "jpeg" or "png"
+            quality: JPEG quality (0-100); ignored for PNG
+            use_cache: Reuse the capture of an unchanged-looking page
         
         Returns:
-            bytes: The screenshot as PNG bytes
+            bytes: The screenshot as image bytes in the requested format
         """
+        page = page or self.page
         try:
-            logger.info("Taking screenshot as buffer")
-            screenshot_bytes = await self.page.screenshot(type="png", full_page=False)
-            logger.info(f"Screenshot buffer created: {len(screenshot_bytes)} bytes")
+            if use_cache:
+                key = (await page.evaluate(_PAGE_FINGERPRINT_JS), fmt, quality)
+                cached = self._shot_cache.get(key)
+                if cached is not None:
+                    self._shot_cache.move_to_end(key)
+                    logger.info("Page unchanged since last capture, reusing screenshot")
+                    return cached
+            
+            logger.info("Taking %s screenshot as buffer", fmt)
+            if fmt == "jpeg":
+                screenshot_bytes = await page.screenshot(type="jpeg", quality=quality, full_page=False)
+            else:
+                screenshot_bytes = await page.screenshot(type=fmt, full_page=False)
+            logger.info("Screenshot buffer created: %d bytes", len(screenshot_bytes))
+            
+            if use_cache:
+                self._shot_cache[key] = screenshot_bytes
+                if len(self._shot_cache) > SCREENSHOT_CACHE_MAX_ENTRIES:
+                    self._shot_cache.popitem(last=False)
             return screenshot_bytes
         except Exception as e:
-            logger.error(f"Failed to create screenshot buffer: {str(e)}", exc_info=True)
+            logger.error("Failed to create screenshot buffer: %s", e, exc_info=True)
             raise
 
+    async def screenshot_into(
+        self,
+        buf: io.BytesIO,
+        page: Optional[Page] = None,
+        fmt: str = SCREENSHOT_FORMAT,
+        quality: int = SCREENSHOT_QUALITY
+    ) -> int:
+        """
+        Take a screenshot and write it into a caller-provided buffer.
+        
+        Lets callers collect screenshots in one buffer and hand
+        buf.getbuffer() (a memoryview) to the helpers without another copy.
+        
+        Args:
+            buf: Buffer to append the image bytes to
+            page: Page to capture; defaults to the agent's own page
+            fmt: Image format, "jpeg" or "png"
+            quality: JPEG quality (0-100); ignored for PNG
+        
+        Returns:
+            int: Number of bytes written
+        """
+        return buf.write(await self.screenshot_buffer(page, fmt, quality))
+
     async def close(self):
-        """Close the browser and clean up resources."""
+        """
+        Close the context and return the browser to the shared pool.
+        
+        Closing a persistent-profile context also shuts down its browser.
+        """
         try:
-            logger.info("Closing browser and cleaning up resources")
+            logger.info("Closing context and releasing browser")
+            if self.context:
+                await self.context.close()
+        except Exception as e:
+            logger.error("Error during cleanup: %s", e, exc_info=True)
+            # Don't re-raise during cleanup
+        finally:
+            # Release even if closing the context failed (e.g. after a
+            # crash) so the pool slot isn't leaked
             if self.browser:
-                await self.browser.close()
-            if self.playwright:
-                await self.playwright.stop()
-            
-            self.playwright = None
+                await browser_pool.release(self.browser)
             self.browser = None
+            self.context = None
             self.page = None
-            logger.info("Browser closed successfully")
-        except Exception as e:
-            logger.error(f"Error during cleanup: {str(e)}", exc_info=True)
-            # Don't re-raise during cleanup
+            logger.info("Browser released successfully")
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -0,0 +1,251 @@
+"""
+Unit tests for the browser_pool module.
+
+Tests cover slot accounting, reuse of released browsers, crash handling
+and rebinding to a new event loop. Browser launches are mocked.
+"""
+
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+src_path = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(src_path))
+
+from browser_pool import BrowserPool
+from web_scraper import WebScraperAgent
+
+
+def _make_browser(connected=True):
+    """Create a mock Browser that reports the given connection state."""
+    browser = MagicMock()
+    browser.is_connected.return_value = connected
+    browser.close = AsyncMock()
+    context = MagicMock()
+    context.pages = []
+    context.route = AsyncMock()
+    context.new_page = AsyncMock()
+    context.close = AsyncMock()
+    browser.new_context = AsyncMock(return_value=context)
+    return browser
+
+
+def _make_pool(max_size=2):
+    """Create a pool whose launches return fresh mock browsers."""
+    pool = BrowserPool(max_size=max_size)
+    pool._launch = AsyncMock(side_effect=lambda: _make_browser())
+    return pool
+
+
+class TestBrowserPool(unittest.IsolatedAsyncioTestCase):
+    """Test cases for BrowserPool acquire/release accounting."""
+    
+    async def test_acquire_launches_until_max_size(self):
+        """Test that each acquire launches a browser while slots are free."""
+        pool = _make_pool(max_size=2)
+        
+        first = await pool.acquire()
+        second = await pool.acquire()
+        
+        self.assertIsNot(first, second)
+        self.assertEqual(pool._launch.await_count, 2)
+        self.assertEqual(pool._launched, 2)
+    
+    async def test_released_browser_is_reused(self):
+        """Test that a released browser is handed out again without launching."""
+        pool = _make_pool()
+        browser = await pool.acquire()
+        await pool.release(browser)
+        
+        result = await pool.acquire()
+        
+        self.assertIs(result, browser)
+        pool._launch.assert_awaited_once()
+    
+    async def test_acquire_waits_for_release_when_full(self):
+        """Test that acquire blocks at max_size until a browser is released."""
+        pool = _make_pool(max_size=1)
+        browser = await pool.acquire()
+        
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        self.assertFalse(waiter.done())
+        
+        await pool.release(browser)
+        result = await asyncio.wait_for(waiter, timeout=1)
+        
+        self.assertIs(result, browser)
+        pool._launch.assert_awaited_once()
+    
+    async def test_waiter_wakes_when_crashed_browser_is_released(self):
+        """Test that a waiter at max_size launches once a crashed browser is released."""
+        pool = _make_pool(max_size=1)
+        browser = await pool.acquire()
+        
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        self.assertFalse(waiter.done())
+        
+        browser.is_connected.return_value = False
+        await pool.release(browser)
+        result = await asyncio.wait_for(waiter, timeout=1)
+        
+        self.assertIsNot(result, browser)
+        self.assertEqual(pool._launch.await_count, 2)
+        self.assertEqual(pool._launched, 1)
+    
+    async def test_waiter_wakes_when_launch_fails(self):
+        """Test that a failed launch frees its slot for a waiting acquire."""
+        pool = _make_pool(max_size=1)
+        launch_started = asyncio.Event()
+        fail_launch = asyncio.Event()
+        
+        async def _failing_launch():
+            pool._launch.side_effect = _make_browser
+            launch_started.set()
+            await fail_launch.wait()
+            raise RuntimeError("launch failed")
+        
+        pool._launch.side_effect = _failing_launch
+        first = asyncio.create_task(pool.acquire())
+        await launch_started.wait()
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        fail_launch.set()
+        
+        with self.assertRaises(RuntimeError):
+            await first
+        result = await asyncio.wait_for(waiter, timeout=1)
+        
+        self.assertTrue(result.is_connected())
+        self.assertEqual(pool._launched, 1)
+    
+    async def test_failed_launch_frees_slot(self):
+        """Test that a launch error doesn't consume a pool slot."""
+        pool = _make_pool(max_size=1)
+        pool._launch.side_effect = [RuntimeError("launch failed"), _make_browser()]
+        
+        with self.assertRaises(RuntimeError):
+            await pool.acquire()
+        browser = await pool.acquire()
+        
+        self.assertTrue(browser.is_connected())
+        self.assertEqual(pool._launched, 1)
+    
+    async def test_release_of_disconnected_browser_frees_slot(self):
+        """Test that releasing a crashed browser lets a new one launch."""
+        pool = _make_pool(max_size=1)
+        browser = await pool.acquire()
+        browser.is_connected.return_value = False
+        
+        await pool.release(browser)
+        result = await asyncio.wait_for(pool.acquire(), timeout=1)
+        
+        self.assertIsNot(result, browser)
+        self.assertEqual(pool._launched, 1)
+    
+    async def test_idle_disconnected_browser_is_discarded(self):
+        """Test that a browser that crashed while idle is replaced."""
+        pool = _make_pool(max_size=1)
+        browser = await pool.acquire()
+        await pool.release(browser)
+        browser.is_connected.return_value = False
+        
+        result = await asyncio.wait_for(pool.acquire(), timeout=1)
+        
+        self.assertIsNot(result, browser)
+        self.assertEqual(pool._launch.await_count, 2)
+    
+    async def test_warm_up_fills_idle_queue(self):
+        """Test that warm_up pre-launches browsers capped at max_size."""
+        pool = _make_pool(max_size=2)
+        
+        await pool.warm_up(5)
+        
+        self.assertEqual(pool._launch.await_count, 2)
+        self.assertEqual(len(pool._idle), 2)
+        await pool.acquire()
+        self.assertEqual(pool._launch.await_count, 2)
+    
+    async def test_close_closes_idle_browsers(self):
+        """Test that close shuts idle browsers and resets accounting."""
+        pool = _make_pool()
+        browser = await pool.acquire()
+        await pool.release(browser)
+        
+        await pool.close()
+        
+        browser.close.assert_awaited_once()
+        self.assertEqual(pool._launched, 0)
+
+
+class TestBrowserPoolEventLoops(unittest.TestCase):
+    """Test cases for using one pool from several event loops."""
+    
+    def test_new_event_loop_discards_previous_state(self):
+        """Test that a second asyncio.run doesn't reuse the first loop's browsers."""
+        pool = _make_pool(max_size=1)
+        first = asyncio.run(pool.acquire())
+        
+        # The first browser was never released; without rebinding the
+        # full pool would make this acquire wait forever
+        second = asyncio.run(asyncio.wait_for(pool.acquire(), timeout=1))
+        
+        self.assertIsNot(first, second)
+        self.assertEqual(pool._launch.await_count, 2)
+    
+    def test_release_from_previous_loop_is_ignored(self):
+        """Test that a browser from a discarded loop isn't put back in the pool."""
+        pool = _make_pool(max_size=1)
+        stale = asyncio.run(pool.acquire())
+        
+        async def _release_and_acquire():
+            fresh = await pool.acquire()
+            await pool.release(stale)
+            await pool.release(fresh)
+            return await pool.acquire()
+        
+        result = asyncio.run(_release_and_acquire())
+        
+        self.assertIsNot(result, stale)
+
+
+class TestWebScraperAgentPoolUsage(unittest.IsolatedAsyncioTestCase):
+    """Test cases for how WebScraperAgent returns browsers to the pool."""
+    
+    async def test_crashed_browser_is_released_before_reacquire(self):
+        """Test that repeated browser crashes don't exhaust the pool."""
+        pool = _make_pool(max_size=2)
+        agent = WebScraperAgent()
+        
+        with patch('web_scraper.browser_pool', pool):
+            for _ in range(3):
+                await asyncio.wait_for(agent.init_browser(), timeout=1)
+                agent.browser.is_connected.return_value = False
+            await asyncio.wait_for(agent.init_browser(), timeout=1)
+        
+        self.assertTrue(agent.browser.is_connected())
+        self.assertLessEqual(pool._launched, 2)
+    
+    async def test_close_releases_browser_when_context_close_fails(self):
+        """Test that close returns the browser even if closing the context raises."""
+        pool = _make_pool(max_size=1)
+        agent = WebScraperAgent()
+        
+        with patch('web_scraper.browser_pool', pool):
+            await agent.init_browser()
+            browser = agent.browser
+            agent.context.close = AsyncMock(side_effect=RuntimeError("crashed"))
+            await agent.close()
+            
+            result = await asyncio.wait_for(pool.acquire(), timeout=1)
+        
+        self.assertIs(result, browser)
+        self.assertIsNone(agent.context)
+
+
+if __name__ == '__main__':
+    unittest.main()
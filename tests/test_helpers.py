@@ -1,14 +1,16 @@
 """
 Unit tests for the helpers module.
 
-Tests cover environment configuration, API client creation,
-and data visualization functions.
+Tests cover environment configuration, API client creation, per-loop
+HTTP clients and data visualization functions.
 """
 
+import asyncio
 import os
 import unittest
 from unittest.mock import patch, MagicMock, Mock
 import base64
+import binascii
 import sys
 from pathlib import Path
 
@@ -18,18 +20,27 @@ sys.path.insert(0, str(src_path))
 
 from helpers import (
     load_env,
+    clear_env_cache,
     get_openai_api_key,
     get_openai_client,
     get_multi_on_api_key,
     get_multi_on_client,
+    LoopLocalClient,
     _build_table_html,
     _create_screenshot_html,
 )
+from models import DeeplearningCourse
 
 
 class TestEnvironmentConfiguration(unittest.TestCase):
     """Test cases for environment configuration functions."""
     
+    def setUp(self):
+        clear_env_cache()
+    
+    def tearDown(self):
+        clear_env_cache()
+    
     @patch('helpers.load_dotenv')
     @patch('helpers.find_dotenv')
     def test_load_env_calls_dotenv_functions(self, mock_find, mock_load):
@@ -40,6 +51,29 @@ class TestEnvironmentConfiguration(unittest.TestCase):
         mock_find.assert_called_once()
         mock_load.assert_called_once_with('.env')
     
+    @patch('helpers.load_dotenv')
+    @patch('helpers.find_dotenv')
+    def test_load_env_runs_only_once(self, mock_find, mock_load):
+        """Test that repeated load_env calls reuse the first load."""
+        mock_find.return_value = '.env'
+        load_env()
+        load_env()
+        
+        mock_find.assert_called_once()
+        mock_load.assert_called_once()
+    
+    @patch('helpers.load_dotenv')
+    @patch('helpers.find_dotenv')
+    def test_clear_env_cache_forces_reload(self, mock_find, mock_load):
+        """Test that clear_env_cache makes the next load_env hit disk again."""
+        mock_find.return_value = '.env'
+        load_env()
+        clear_env_cache()
+        load_env()
+        
+        self.assertEqual(mock_find.call_count, 2)
+        self.assertEqual(mock_load.call_count, 2)
+    
     @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key-123'}, clear=True)
     @patch('helpers.load_env')
     def test_get_openai_api_key_returns_key(self, mock_load_env):
@@ -49,6 +83,17 @@ class TestEnvironmentConfiguration(unittest.TestCase):
         self.assertEqual(result, 'test-key-123')
         mock_load_env.assert_called_once()
     
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key-123'}, clear=True)
+    @patch('helpers.load_env')
+    def test_get_openai_api_key_is_cached(self, mock_load_env):
+        """Test that a found API key is served from cache on later calls."""
+        get_openai_api_key()
+        os.environ['OPENAI_API_KEY'] = 'changed-key'
+        result = get_openai_api_key()
+        
+        self.assertEqual(result, 'test-key-123')
+        mock_load_env.assert_called_once()
+    
     @patch.dict(os.environ, {}, clear=True)
     @patch('helpers.load_env')
     def test_get_openai_api_key_returns_none_when_missing(self, mock_load_env):
@@ -73,11 +118,30 @@ class TestEnvironmentConfiguration(unittest.TestCase):
         result = get_multi_on_api_key()
         
         self.assertIsNone(result)
+    
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key-123'}, clear=True)
+    @patch('helpers.load_dotenv')
+    @patch('helpers.find_dotenv')
+    def test_api_key_lookups_share_one_env_load(self, mock_find, mock_load):
+        """Test that key lookups, including missing keys, read .env only once."""
+        mock_find.return_value = '.env'
+        get_openai_api_key()
+        get_multi_on_api_key()
+        get_multi_on_api_key()
+        
+        mock_find.assert_called_once()
+        mock_load.assert_called_once_with('.env')
 
 
 class TestClientCreation(unittest.TestCase):
     """Test cases for API client creation functions."""
     
+    def setUp(self):
+        clear_env_cache()
+    
+    def tearDown(self):
+        clear_env_cache()
+    
     @patch('helpers.OpenAI')
     @patch('helpers.get_openai_api_key')
     def test_get_openai_client_creates_client(self, mock_get_key, mock_openai_class):
@@ -102,7 +166,19 @@ class TestClientCreation(unittest.TestCase):
         
         self.assertIn('OPENAI_API_KEY not found', str(context.exception))
     
-    @patch('helpers.MultiOn')
+    @patch('helpers.OpenAI')
+    @patch('helpers.get_openai_api_key')
+    def test_get_openai_client_is_cached(self, mock_get_key, mock_openai_class):
+        """Test that repeated calls return the same OpenAI client."""
+        mock_get_key.return_value = 'valid-key'
+        
+        first = get_openai_client()
+        second = get_openai_client()
+        
+        self.assertIs(first, second)
+        mock_openai_class.assert_called_once_with(api_key='valid-key')
+    
+    @patch('multion.client.MultiOn')
     @patch('helpers.get_multi_on_api_key')
     def test_get_multi_on_client_creates_client(self, mock_get_key, mock_multion_class):
         """Test successful MultiOn client creation."""
@@ -127,6 +203,49 @@ class TestClientCreation(unittest.TestCase):
         self.assertIn('MULTION_API_KEY not found', str(context.exception))
 
 
+class TestLoopLocalClient(unittest.TestCase):
+    """Test cases for httpx clients shared per event loop."""
+    
+    def test_client_is_shared_within_a_loop(self):
+        """Test that one loop gets one client built from the given kwargs."""
+        clients = LoopLocalClient(timeout=3.0)
+        
+        async def _get():
+            first, second = clients.get(), clients.get()
+            await clients.close()
+            return first, second
+        
+        first, second = asyncio.run(_get())
+        
+        self.assertIs(first, second)
+        self.assertEqual(first.timeout.connect, 3.0)
+    
+    def test_new_event_loop_gets_new_client(self):
+        """Test that a second asyncio.run doesn't reuse the first loop's client."""
+        clients = LoopLocalClient()
+        
+        async def _get():
+            return clients.get()
+        
+        self.assertIsNot(asyncio.run(_get()), asyncio.run(_get()))
+    
+    def test_close_reports_whether_a_client_was_closed(self):
+        """Test that close drops the loop's client and is a no-op without one."""
+        clients = LoopLocalClient()
+        
+        async def _close():
+            client = clients.get()
+            closed = await clients.close()
+            return client, closed, await clients.close(), clients.get()
+        
+        client, closed, closed_again, replacement = asyncio.run(_close())
+        
+        self.assertTrue(closed)
+        self.assertTrue(client.is_closed)
+        self.assertFalse(closed_again)
+        self.assertIsNot(replacement, client)
+
+
 class TestTableBuilder(unittest.TestCase):
     """Test cases for HTML table building function."""
     
@@ -165,6 +284,31 @@ class TestTableBuilder(unittest.TestCase):
         self.assertIn('target="_blank"', result)
         self.assertIn('Python Basics</a>', result)
     
+    def test_build_table_html_resolves_course_urls(self):
+        """Test that relative and absolute course URLs resolve against base_url."""
+        courses_data = [
+            {'title': 'Relative', 'courseURL': 'courses/relative'},
+            {'title': 'Absolute', 'courseURL': 'https://other.com/courses/absolute'},
+        ]
+        
+        result = _build_table_html(courses_data, 'https://example.com/')
+        
+        self.assertIn('<a href="https://example.com/courses/relative"', result)
+        self.assertIn('<a href="https://other.com/courses/absolute"', result)
+    
+    def test_build_table_html_does_not_mutate_input(self):
+        """Test that building the table leaves the course dicts untouched."""
+        courses_data = [
+            {
+                'title': 'Python Basics',
+                'courseURL': '/courses/python-101'
+            }
+        ]
+        
+        _build_table_html(courses_data, 'https://example.com')
+        
+        self.assertEqual(courses_data[0]['courseURL'], '/courses/python-101')
+    
     def test_build_table_html_with_image_url(self):
         """Test table building with imageUrl field."""
         courses_data = [
@@ -195,6 +339,36 @@ class TestTableBuilder(unittest.TestCase):
         # Verify list is joined with commas
         self.assertIn('Python, Data Science, AI', result)
     
+    def test_build_table_html_escapes_values(self):
+        """Test that scraped values are HTML-escaped."""
+        courses_data = [
+            {
+                'title': 'Tom & Jerry',
+                'description': '<script>alert(1)</script>'
+            }
+        ]
+        
+        result = _build_table_html(courses_data, 'https://example.com')
+        
+        self.assertIn('Tom &amp; Jerry', result)
+        self.assertIn('&lt;script&gt;alert(1)&lt;/script&gt;', result)
+        self.assertNotIn('<script>', result)
+    
+    def test_build_table_html_rejects_unsafe_link_schemes(self):
+        """Test that non-http(s) course URLs are shown as text, not links."""
+        courses_data = [
+            {'title': 'Script', 'courseURL': 'javascript:alert(1)'},
+            {'title': 'Mixed case', 'courseURL': ' JaVaScRiPt:alert(2)'},
+            {'title': 'Data', 'courseURL': 'data:text/html,<b>x</b>'},
+        ]
+        
+        result = _build_table_html(courses_data, 'https://example.com')
+        
+        self.assertNotIn('<a ', result)
+        self.assertNotIn('href=', result)
+        self.assertIn('javascript:alert(1)', result)
+        self.assertIn('data:text/html,&lt;b&gt;x&lt;/b&gt;', result)
+    
     def test_build_table_html_without_course_url(self):
         """Test table building when courseURL is missing."""
         courses_data = [
@@ -229,6 +403,40 @@ class TestScreenshotHTML(unittest.TestCase):
         self.assertIn('alt="Website Screenshot"', result)
         self.assertIn('max-width:100%', result)
     
+    def test_create_screenshot_html_detects_jpeg(self):
+        """Test that JPEG bytes produce a JPEG data URI."""
+        test_bytes = b'\xff\xd8\xff\xe0fake-jpeg'
+        
+        result = _create_screenshot_html(test_bytes)
+        
+        self.assertIn('<img src="data:image/jpeg;base64,', result)
+    
+    def test_create_screenshot_html_with_explicit_mime(self):
+        """Test that an explicit MIME type overrides detection."""
+        result = _create_screenshot_html(b'fake-image-data', mime='image/webp')
+        
+        self.assertIn('<img src="data:image/webp;base64,', result)
+    
+    @patch('helpers.binascii.b2a_base64', wraps=binascii.b2a_base64)
+    def test_create_screenshot_html_reuses_cached_result(self, mock_b64encode):
+        """Test that the same screenshot is only encoded once."""
+        test_bytes = b'cached-image-data-456'
+        
+        first = _create_screenshot_html(test_bytes)
+        second = _create_screenshot_html(bytes(bytearray(test_bytes)))
+        
+        self.assertEqual(first, second)
+        mock_b64encode.assert_called_once()
+    
+    def test_create_screenshot_html_accepts_memoryview(self):
+        """Test that a memoryview renders the same tag as the equivalent bytes."""
+        test_bytes = b'memoryview-image-data-789'
+        
+        result = _create_screenshot_html(memoryview(test_bytes))
+        
+        self.assertEqual(result, _create_screenshot_html(test_bytes))
+        self.assertIn(base64.b64encode(test_bytes).decode('utf-8'), result)
+    
     def test_create_screenshot_html_with_empty_bytes(self):
         """Test screenshot HTML creation with empty bytes."""
         test_bytes = b''
@@ -244,9 +452,9 @@ class TestScreenshotHTML(unittest.TestCase):
 class TestVisualizeCourses(unittest.TestCase):
     """Test cases for visualize_courses function."""
     
-    @patch('helpers.display')
-    @patch('helpers.HTML')
-    @patch('helpers.Markdown')
+    @patch('IPython.display.display')
+    @patch('IPython.display.HTML')
+    @patch('IPython.display.Markdown')
     def test_visualize_courses_with_no_result(self, mock_markdown, mock_html, mock_display):
         """Test visualize_courses when result is None."""
         import asyncio
@@ -261,9 +469,9 @@ class TestVisualizeCourses(unittest.TestCase):
         mock_markdown.assert_called_once_with("### No results available")
         mock_display.assert_called_once()
     
-    @patch('helpers.display')
-    @patch('helpers.HTML')
-    @patch('helpers.Markdown')
+    @patch('IPython.display.display')
+    @patch('IPython.display.HTML')
+    @patch('IPython.display.Markdown')
     @patch('helpers._create_screenshot_html')
     @patch('helpers._build_table_html')
     def test_visualize_courses_with_valid_result(
@@ -274,15 +482,16 @@ class TestVisualizeCourses(unittest.TestCase):
         import asyncio
         from helpers import visualize_courses
         
-        # Mock course objects
-        mock_course = Mock()
-        mock_course.model_dump.return_value = {
-            'title': 'Test Course',
-            'courseURL': '/course/1'
-        }
+        course = DeeplearningCourse(
+            title='Test Course',
+            description='A test course',
+            presenter=['Jane Doe'],
+            imageUrl='https://example.com/image.png',
+            courseURL='/course/1'
+        )
         
         mock_result = Mock()
-        mock_result.courses = [mock_course]
+        mock_result.courses = [course]
         
         mock_build_table.return_value = '<table>Test Table</table>'
         mock_create_screenshot.return_value = '<img src="data:image/png;base64,test"/>'
@@ -298,15 +507,41 @@ class TestVisualizeCourses(unittest.TestCase):
         
         asyncio.run(run_test())
         
-        # Verify course data was dumped
-        mock_course.model_dump.assert_called_once()
+        # Verify course data was dumped to plain dicts for the table
+        mock_build_table.assert_called_once_with(
+            [course.model_dump()], 'https://example.com'
+        )
         
-        # Verify table and screenshot were created
-        mock_build_table.assert_called_once()
+        # Verify screenshot was created
         mock_create_screenshot.assert_called_once_with(b'screenshot')
         
         # Verify display was called for both sections
         self.assertEqual(mock_display.call_count, 4)  # 2 markdown headers + 2 HTML displays
+    
+    @patch('IPython.display.display')
+    @patch('IPython.display.HTML')
+    @patch('IPython.display.Markdown')
+    @patch('helpers._create_screenshot_html')
+    @patch('helpers._build_table_html')
+    def test_visualize_courses_with_empty_courses(
+        self, mock_build_table, mock_create_screenshot,
+        mock_markdown, mock_html, mock_display
+    ):
+        """Test that an empty course list skips the table but shows the screenshot."""
+        import asyncio
+        from helpers import visualize_courses
+        
+        mock_result = Mock()
+        mock_result.courses = []
+        
+        asyncio.run(visualize_courses(
+            mock_result, b'screenshot', 'url', 'instructions', 'base'
+        ))
+        
+        mock_build_table.assert_not_called()
+        mock_markdown.assert_any_call("### No course data available")
+        mock_create_screenshot.assert_called_once_with(b'screenshot')
+        self.assertEqual(mock_display.call_count, 3)
 
 
 def run_tests():
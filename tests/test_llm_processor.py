@@ -0,0 +1,262 @@
+"""
+Unit tests for the llm_processor module.
+
+Tests cover API key checks, tokenizer loading, HTML cleaning, token-limit
+truncation and the shared per-event-loop OpenAI clients. No requests are sent and the
+tokenizer is replaced with test doubles.
+"""
+
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+src_path = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(src_path))
+
+from llm_processor import LLMProcessor, close_shared_clients
+
+
+def _make_processor(api_key='k'):
+    """Create a processor without loading a tiktoken encoding."""
+    with patch.object(LLMProcessor, '_get_encoding', return_value=None):
+        return LLMProcessor(api_key=api_key)
+
+
+def _make_encoding():
+    """Create a mock encoding with one token per character."""
+    encoding = MagicMock()
+    encoding.encode.side_effect = list
+    encoding.decode.side_effect = ''.join
+    return encoding
+
+
+class TestInit(unittest.TestCase):
+    """Test cases for LLMProcessor construction."""
+    
+    @patch('llm_processor.get_openai_api_key', return_value=None)
+    def test_missing_api_key_raises(self, mock_get_key):
+        """Test that a missing API key fails at construction, not at the first call."""
+        with self.assertRaises(ValueError) as context:
+            _make_processor(api_key=None)
+        
+        self.assertIn('OPENAI_API_KEY not found', str(context.exception))
+    
+    @patch('llm_processor.get_openai_api_key', return_value='env-key')
+    def test_api_key_falls_back_to_environment(self, mock_get_key):
+        """Test that the environment key is used when none is passed."""
+        processor = _make_processor(api_key=None)
+        
+        self.assertEqual(processor._api_key, 'env-key')
+
+
+class TestGetEncoding(unittest.TestCase):
+    """Test cases for loading and caching the tiktoken encoding."""
+    
+    def setUp(self):
+        LLMProcessor._load_encoding.cache_clear()
+    
+    def tearDown(self):
+        LLMProcessor._load_encoding.cache_clear()
+    
+    @patch('llm_processor.tiktoken.encoding_for_model', side_effect=KeyError('unknown-model'))
+    def test_unknown_model_is_cached_as_none(self, mock_for_model):
+        """Test that an unknown model isn't looked up again."""
+        self.assertIsNone(LLMProcessor._get_encoding('unknown-model'))
+        self.assertIsNone(LLMProcessor._get_encoding('unknown-model'))
+        
+        mock_for_model.assert_called_once()
+    
+    @patch('llm_processor.tiktoken.encoding_for_model')
+    def test_load_error_is_retried(self, mock_for_model):
+        """Test that a failed BPE download isn't cached."""
+        encoding = MagicMock()
+        mock_for_model.side_effect = [ConnectionError('offline'), encoding]
+        
+        self.assertIsNone(LLMProcessor._get_encoding('gpt-4o'))
+        self.assertIs(LLMProcessor._get_encoding('gpt-4o'), encoding)
+        self.assertIs(LLMProcessor._get_encoding('gpt-4o'), encoding)
+        
+        self.assertEqual(mock_for_model.call_count, 2)
+    
+    def test_processor_retries_failed_default_encoding(self):
+        """Test that a processor created offline picks up the encoding later."""
+        processor = _make_processor()
+        encoding = _make_encoding()
+        
+        with patch.object(LLMProcessor, '_get_encoding', return_value=encoding):
+            result = processor._truncate_html('a' * 150, 100)
+        
+        self.assertEqual(result, 'a' * 100)
+        self.assertIs(processor._encoding, encoding)
+
+
+class TestCleanHtml(unittest.TestCase):
+    """Test cases for stripping non-content markup before tokenization."""
+    
+    def setUp(self):
+        self.processor = _make_processor()
+    
+    def test_removes_stripped_tags_and_contents(self):
+        """Test that tags in HTML_STRIP_TAGS are removed along with their contents."""
+        html = (
+            '<html><head><style>p { color: red; }</style>'
+            '<meta charset="utf-8"><link rel="stylesheet" href="a.css"></head>'
+            '<body><script>alert("x")</script><noscript>Enable JS</noscript>'
+            '<svg><path d="M0 0"/></svg><iframe src="ad.html"></iframe>'
+            '<p>Course</p></body></html>'
+        )
+        
+        result = self.processor._clean_html(html)
+        
+        for fragment in ('style', 'color: red', 'meta', 'stylesheet', 'script',
+                         'alert', 'noscript', 'Enable JS', 'svg', 'iframe'):
+            self.assertNotIn(fragment, result)
+        self.assertIn('<p>Course</p>', result)
+    
+    def test_collapses_whitespace(self):
+        """Test that runs of whitespace become a single space."""
+        html = '<div>\n    <p>Intro   to\t\tPython</p>\n\n</div>'
+        
+        result = self.processor._clean_html(html)
+        
+        self.assertIn('<div> <p>Intro to Python</p> </div>', result)
+        self.assertNotIn('  ', result)
+    
+    def test_keeps_content_markup(self):
+        """Test that links and text needed for extraction survive cleaning."""
+        html = '<ul><li><a href="/courses/python">Python</a></li></ul>'
+        
+        result = self.processor._clean_html(html)
+        
+        self.assertIn('<a href="/courses/python">Python</a>', result)
+
+
+class TestTruncateHtml(unittest.TestCase):
+    """Test cases for keeping HTML within the token limit."""
+    
+    def setUp(self):
+        self.processor = _make_processor()
+        self.encoding = _make_encoding()
+        self.processor._encoding = self.encoding
+    
+    def _without_encoding(self):
+        """Simulate a tokenizer that can't be loaded."""
+        self.processor._encoding = None
+        patcher = patch.object(LLMProcessor, '_get_encoding', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_short_ascii_html_skips_tokenizer(self):
+        """Test that ASCII text no longer than max_tokens is returned untokenized."""
+        html = 'a' * 100
+        
+        result = self.processor._truncate_html(html, 100)
+        
+        self.assertEqual(result, html)
+        self.encoding.encode.assert_not_called()
+    
+    def test_short_non_ascii_html_within_byte_bound_skips_tokenizer(self):
+        """Test that non-ASCII text is skipped when 4 bytes per char still fit."""
+        html = 'é' * 25
+        
+        result = self.processor._truncate_html(html, 100)
+        
+        self.assertEqual(result, html)
+        self.encoding.encode.assert_not_called()
+    
+    def test_non_ascii_html_beyond_byte_bound_is_tokenized(self):
+        """Test that non-ASCII text that might exceed the limit is tokenized."""
+        html = 'é' * 50
+        
+        result = self.processor._truncate_html(html, 100)
+        
+        self.assertEqual(result, html)
+        self.encoding.encode.assert_called_once_with(html)
+    
+    def test_long_html_is_truncated_to_max_tokens(self):
+        """Test that HTML over the limit is cut to max_tokens tokens."""
+        html = 'a' * 150
+        
+        result = self.processor._truncate_html(html, 100)
+        
+        self.assertEqual(result, 'a' * 100)
+        self.encoding.encode.assert_called_once_with(html)
+    
+    def test_without_encoding_keeps_html_within_estimate(self):
+        """Test that without a tokenizer HTML within ~4 chars per token is kept."""
+        self._without_encoding()
+        html = 'é' * 400
+        
+        result = self.processor._truncate_html(html, 100)
+        
+        self.assertEqual(result, html)
+    
+    def test_without_encoding_truncates_by_characters(self):
+        """Test that without a tokenizer HTML is cut to 4 characters per token."""
+        self._without_encoding()
+        html = 'a' * 1000
+        
+        result = self.processor._truncate_html(html, 100)
+        
+        self.assertEqual(result, 'a' * 400)
+    
+    def test_without_encoding_count_tokens_estimates(self):
+        """Test that token counting falls back to 4 characters per token."""
+        self._without_encoding()
+        
+        self.assertEqual(self.processor._count_tokens('a' * 42), 10)
+
+
+class TestSharedClients(unittest.TestCase):
+    """Test cases for the OpenAI clients shared within an event loop."""
+    
+    def setUp(self):
+        patcher = patch.object(LLMProcessor, '_get_encoding', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_client_is_shared_within_a_loop(self):
+        """Test that processors on the same loop share one client."""
+        async def _clients():
+            first = LLMProcessor(api_key='k').client
+            second = LLMProcessor(api_key='k').client
+            await close_shared_clients()
+            return first, second
+        
+        first, second = asyncio.run(_clients())
+        
+        self.assertIs(first, second)
+    
+    def test_new_event_loop_gets_new_client(self):
+        """Test that a second asyncio.run doesn't reuse the first loop's client."""
+        processor = LLMProcessor(api_key='k')
+        
+        async def _client():
+            return processor.client, processor.client._client
+        
+        first, first_http = asyncio.run(_client())
+        second, second_http = asyncio.run(_client())
+        
+        self.assertIsNot(first, second)
+        self.assertIsNot(first_http, second_http)
+    
+    def test_close_shared_clients_drops_loop_client(self):
+        """Test that a closed connection pool is replaced on next use."""
+        async def _clients():
+            first = LLMProcessor(api_key='k').client
+            await close_shared_clients()
+            second = LLMProcessor(api_key='k').client
+            await close_shared_clients()
+            return first, second
+        
+        first, second = asyncio.run(_clients())
+        
+        self.assertIsNot(first, second)
+        self.assertTrue(first._client.is_closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
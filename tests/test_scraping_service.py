@@ -0,0 +1,191 @@
+"""
+Unit tests for the scraping_service module.
+
+Tests cover the shared-browser context manager, the per-page flow and its
+concurrency cap, and running the LLM request alongside the screenshot.
+The scraper agent and LLM processor are mocked; no browser is launched.
+"""
+
+import asyncio
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import patch, MagicMock, AsyncMock
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+src_path = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(src_path))
+
+from scraping_service import ScrapingService
+
+URL = 'https://example.com/courses'
+HTML = '<html><body>courses</body></html>'
+SCREENSHOT = b'jpeg-bytes'
+
+
+def _make_agent():
+    """Create a mock WebScraperAgent whose pages and scrapes succeed."""
+    agent = MagicMock()
+    agent.preconnect = AsyncMock()
+    agent.close = AsyncMock()
+    agent.scrape_content = AsyncMock(return_value=HTML)
+    agent.screenshot_buffer = AsyncMock(return_value=SCREENSHOT)
+    agent.__aenter__.return_value = agent
+    agent.pages = []
+    
+    @asynccontextmanager
+    async def _new_page():
+        page = MagicMock()
+        agent.pages.append(page)
+        yield page
+    
+    agent.new_page = MagicMock(side_effect=_new_page)
+    return agent
+
+
+class ScrapingServiceTestCase(unittest.IsolatedAsyncioTestCase):
+    """Base class patching the agent and LLM processor used by the service."""
+    
+    def setUp(self):
+        self.agent = _make_agent()
+        self.agent_cls = MagicMock(return_value=self.agent)
+        self.llm = MagicMock()
+        self.llm.process_html_to_structured_data = AsyncMock(return_value='result')
+        for target, value in (
+            ('scraping_service.WebScraperAgent', self.agent_cls),
+            ('scraping_service.LLMProcessor', MagicMock(return_value=self.llm)),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class TestContextManager(ScrapingServiceTestCase):
+    """Test cases for holding one browser across calls."""
+    
+    async def test_enter_preconnects_and_exit_closes(self):
+        """Test that the shared browser is started on entry and closed on exit."""
+        async with ScrapingService() as service:
+            self.agent.preconnect.assert_awaited_once()
+            self.assertIs(service._scraper, self.agent)
+        
+        self.agent.close.assert_awaited_once()
+        self.assertIsNone(service._scraper)
+    
+    async def test_failed_preconnect_closes_agent(self):
+        """Test that a failed start-up doesn't leak the browser."""
+        self.agent.preconnect.side_effect = RuntimeError("launch failed")
+        service = ScrapingService()
+        
+        with self.assertRaises(RuntimeError):
+            async with service:
+                pass
+        
+        self.agent.close.assert_awaited_once()
+        self.assertIsNone(service._scraper)
+
+
+class TestScrapeAndProcess(ScrapingServiceTestCase):
+    """Test cases for scraping and processing a single URL."""
+    
+    async def test_without_entry_uses_short_lived_agent(self):
+        """Test that an un-entered service scrapes on the agent's own page."""
+        service = ScrapingService()
+        
+        result = await service.scrape_and_process(URL, 'extract', MagicMock())
+        
+        self.assertEqual(result, ('result', SCREENSHOT))
+        self.agent.__aenter__.assert_awaited_once()
+        self.agent.__aexit__.assert_awaited_once()
+        self.agent.scrape_content.assert_awaited_once_with(
+            URL, None, force_refresh=True, force_js=True
+        )
+        self.agent.new_page.assert_not_called()
+    
+    async def test_entered_service_opens_page_per_call(self):
+        """Test that each call on an entered service scrapes on a fresh page."""
+        async with ScrapingService() as service:
+            await service.scrape_and_process(URL, 'extract', MagicMock())
+            await service.scrape_and_process(URL, 'extract', MagicMock())
+        
+        self.assertEqual(len(self.agent.pages), 2)
+        self.assertIsNot(self.agent.pages[0], self.agent.pages[1])
+        self.assertIs(self.agent.screenshot_buffer.await_args.args[0], self.agent.pages[1])
+        self.agent_cls.assert_called_once()
+    
+    async def test_concurrent_calls_are_capped(self):
+        """Test that at most max_concurrency pages are scraped at once."""
+        active = 0
+        max_active = 0
+        
+        async def _scrape_content(*args, **kwargs):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return HTML
+        
+        self.agent.scrape_content.side_effect = _scrape_content
+        
+        async with ScrapingService(max_concurrency=2) as service:
+            await asyncio.gather(
+                *(service.scrape_and_process(URL, 'extract', MagicMock()) for _ in range(5))
+            )
+        
+        self.assertEqual(max_active, 2)
+        self.assertEqual(len(self.agent.pages), 5)
+
+
+class TestScrapePage(ScrapingServiceTestCase):
+    """Test cases for running the LLM request alongside the screenshot."""
+    
+    async def test_returns_result_and_screenshot(self):
+        """Test that the LLM gets the scraped HTML and both outputs are returned."""
+        service = ScrapingService()
+        page = MagicMock()
+        model = MagicMock()
+        
+        result = await service._scrape_page(self.agent, page, URL, 'extract', model)
+        
+        self.assertEqual(result, ('result', SCREENSHOT))
+        self.llm.process_html_to_structured_data.assert_awaited_once_with(
+            HTML, 'extract', model
+        )
+        self.agent.screenshot_buffer.assert_awaited_once_with(page)
+    
+    async def test_failed_screenshot_cancels_llm_request(self):
+        """Test that the LLM request doesn't outlive a failed screenshot."""
+        llm_started = asyncio.Event()
+        llm_cancelled = False
+        
+        async def _process(*args):
+            nonlocal llm_cancelled
+            llm_started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                llm_cancelled = True
+                raise
+        
+        async def _screenshot(page):
+            await llm_started.wait()
+            raise RuntimeError("page crashed")
+        
+        self.llm.process_html_to_structured_data.side_effect = _process
+        self.agent.screenshot_buffer.side_effect = _screenshot
+        service = ScrapingService()
+        
+        with self.assertRaises(RuntimeError):
+            await asyncio.wait_for(
+                service._scrape_page(self.agent, None, URL, 'extract', MagicMock()),
+                timeout=1
+            )
+        await asyncio.sleep(0)
+        
+        self.assertTrue(llm_cancelled)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,501 @@
+"""
+Unit tests for the web_scraper module.
+
+Tests cover the shared content cache, the browserless HTTP fast path and
+navigation timeouts of scrape_content, batch scraping, the screenshot cache
+and persistent profiles. Pages and HTTP responses are mocked; no browser is
+launched.
+"""
+
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+import sys
+from pathlib import Path
+
+import httpx
+
+# Add src directory to path for imports
+src_path = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(src_path))
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+import web_scraper
+from web_scraper import WebScraperAgent, _fetch_static, _get_fetch_client, close_fetch_client
+from config import FETCH_MIN_HTML_LENGTH, CONTENT_CACHE_TTL
+
+URL = 'https://example.com/courses'
+STATIC_HTML = '<html><body>' + 'x' * FETCH_MIN_HTML_LENGTH + '</body></html>'
+RENDERED_HTML = '<html><body>rendered</body></html>'
+
+
+def _mock_client(handler):
+    """Create an httpx client whose requests are answered by handler."""
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _respond(status=200, text=STATIC_HTML):
+    """Create a MockTransport handler returning a fixed response."""
+    return lambda request: httpx.Response(status, text=text)
+
+
+def _make_page(html=RENDERED_HTML, url=URL):
+    """Create a mock Page whose navigation succeeds and yields html."""
+    page = MagicMock()
+    page.url = url
+    page.goto = AsyncMock()
+    page.wait_for_load_state = AsyncMock()
+    page.content = AsyncMock(return_value=html)
+    page.close = AsyncMock()
+    return page
+
+
+class TestContentCache(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the URL content cache shared by all agents."""
+    
+    def setUp(self):
+        WebScraperAgent.clear_cache()
+    
+    def tearDown(self):
+        WebScraperAgent.clear_cache()
+    
+    async def test_cache_hit_skips_navigation(self):
+        """Test that a fresh cached entry is served without navigating."""
+        first_page = _make_page()
+        second_page = _make_page(html='<html>changed</html>')
+        
+        await WebScraperAgent().scrape_content(URL, first_page, force_js=True)
+        result = await WebScraperAgent().scrape_content(URL, second_page, force_js=True)
+        
+        self.assertEqual(result, RENDERED_HTML)
+        second_page.goto.assert_not_awaited()
+    
+    async def test_expired_entry_is_refetched(self):
+        """Test that entries older than CONTENT_CACHE_TTL are not served."""
+        agent = WebScraperAgent()
+        page = _make_page()
+        
+        with patch('web_scraper.time.monotonic', return_value=1000.0):
+            await agent.scrape_content(URL, page, force_js=True)
+        page.content.return_value = '<html>fresh</html>'
+        with patch('web_scraper.time.monotonic', return_value=1000.0 + CONTENT_CACHE_TTL):
+            result = await agent.scrape_content(URL, page, force_js=True)
+        
+        self.assertEqual(result, '<html>fresh</html>')
+        self.assertEqual(page.goto.await_count, 2)
+    
+    async def test_force_refresh_bypasses_cache(self):
+        """Test that force_refresh navigates and updates the cached entry."""
+        agent = WebScraperAgent()
+        page = _make_page()
+        await agent.scrape_content(URL, page, force_js=True)
+        page.content.return_value = '<html>fresh</html>'
+        
+        result = await agent.scrape_content(URL, page, force_refresh=True, force_js=True)
+        
+        self.assertEqual(result, '<html>fresh</html>')
+        self.assertEqual(page.goto.await_count, 2)
+        self.assertEqual(WebScraperAgent._content_cache[URL][1], '<html>fresh</html>')
+    
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the cache drops the least recently used URL when full."""
+        with patch('web_scraper.CONTENT_CACHE_MAX_ENTRIES', 2):
+            WebScraperAgent._cache_content('a', 'A')
+            WebScraperAgent._cache_content('b', 'B')
+            WebScraperAgent._cache_content('a', 'A2')
+            WebScraperAgent._cache_content('c', 'C')
+        
+        self.assertEqual(list(WebScraperAgent._content_cache), ['a', 'c'])
+
+
+class TestFetchStatic(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the rules deciding when a plain HTTP fetch is enough."""
+    
+    async def _fetch(self, handler):
+        """Run _fetch_static against a mocked HTTP client."""
+        client = _mock_client(handler)
+        with patch('web_scraper._get_fetch_client', return_value=client):
+            return await _fetch_static(URL)
+    
+    async def test_returns_complete_static_page(self):
+        """Test that a successful, long page without <noscript> is used."""
+        result = await self._fetch(_respond())
+        
+        self.assertEqual(result, STATIC_HTML)
+    
+    async def test_rejects_error_status(self):
+        """Test that 4xx/5xx responses fall back to the browser."""
+        self.assertIsNone(await self._fetch(_respond(status=403)))
+        self.assertIsNone(await self._fetch(_respond(status=500)))
+    
+    async def test_accepts_any_status_below_400(self):
+        """Test that any status below 400 is accepted."""
+        self.assertEqual(await self._fetch(_respond(status=203)), STATIC_HTML)
+    
+    async def test_rejects_short_page(self):
+        """Test that pages at or below the length threshold fall back."""
+        short = 'x' * FETCH_MIN_HTML_LENGTH
+        
+        self.assertIsNone(await self._fetch(_respond(text=short)))
+    
+    async def test_rejects_noscript_page(self):
+        """Test that pages with a <noscript> marker fall back."""
+        html = STATIC_HTML.replace('<body>', '<body><noscript>Enable JS</noscript>')
+        
+        self.assertIsNone(await self._fetch(_respond(text=html)))
+    
+    async def test_returns_none_on_transport_error(self):
+        """Test that connection failures fall back instead of raising."""
+        def _fail(request):
+            raise httpx.ConnectError("connection refused", request=request)
+        
+        self.assertIsNone(await self._fetch(_fail))
+
+
+class TestScrapeContentFastPath(unittest.IsolatedAsyncioTestCase):
+    """Test cases for how scrape_content chooses between HTTP and the browser."""
+    
+    def setUp(self):
+        WebScraperAgent.clear_cache()
+    
+    def tearDown(self):
+        WebScraperAgent.clear_cache()
+    
+    async def test_static_page_skips_browser(self):
+        """Test that a usable HTTP response is returned without navigating."""
+        page = _make_page()
+        agent = WebScraperAgent()
+        
+        with patch('web_scraper._fetch_static', AsyncMock(return_value=STATIC_HTML)):
+            result = await agent.scrape_content(URL, page)
+        
+        self.assertEqual(result, STATIC_HTML)
+        page.goto.assert_not_awaited()
+    
+    async def test_falls_back_to_browser(self):
+        """Test that the page is rendered when the HTTP fetch isn't usable."""
+        page = _make_page()
+        agent = WebScraperAgent()
+        
+        with patch('web_scraper._fetch_static', AsyncMock(return_value=None)):
+            result = await agent.scrape_content(URL, page)
+        
+        self.assertEqual(result, RENDERED_HTML)
+        page.goto.assert_awaited_once()
+    
+    async def test_force_js_skips_http_fetch(self):
+        """Test that force_js always renders in the browser."""
+        page = _make_page()
+        agent = WebScraperAgent()
+        fetch = AsyncMock(return_value=STATIC_HTML)
+        
+        with patch('web_scraper._fetch_static', fetch):
+            result = await agent.scrape_content(URL, page, force_js=True)
+        
+        self.assertEqual(result, RENDERED_HTML)
+        fetch.assert_not_awaited()
+
+
+class TestScrapeContentTimeouts(unittest.IsolatedAsyncioTestCase):
+    """Test cases for navigations that run past NAVIGATION_TIMEOUT."""
+    
+    def setUp(self):
+        WebScraperAgent.clear_cache()
+    
+    def tearDown(self):
+        WebScraperAgent.clear_cache()
+    
+    async def test_committed_navigation_returns_partial_dom(self):
+        """Test that a committed but slow navigation yields the partial DOM."""
+        page = _make_page(html='<html><body>partial</body></html>')
+        page.wait_for_load_state.side_effect = PlaywrightTimeoutError("timeout")
+        agent = WebScraperAgent()
+        
+        result = await agent.scrape_content(URL, page, force_js=True)
+        
+        self.assertEqual(result, '<html><body>partial</body></html>')
+        self.assertEqual(page.goto.await_args.kwargs['wait_until'], 'commit')
+        self.assertNotIn(URL, WebScraperAgent._content_cache)
+    
+    async def test_uncommitted_navigation_raises(self):
+        """Test that the previous document isn't returned when goto never commits."""
+        page = _make_page(html='<html><body>previous page</body></html>')
+        page.goto.side_effect = PlaywrightTimeoutError("timeout")
+        agent = WebScraperAgent()
+        
+        with self.assertRaises(PlaywrightTimeoutError):
+            await agent.scrape_content(URL, page, force_js=True)
+        
+        page.content.assert_not_awaited()
+    
+    async def test_complete_navigation_is_cached(self):
+        """Test that a fully loaded page is cached."""
+        page = _make_page()
+        agent = WebScraperAgent()
+        
+        await agent.scrape_content(URL, page, force_js=True)
+        
+        self.assertEqual(WebScraperAgent._content_cache[URL][1], RENDERED_HTML)
+
+
+class TestScrapeBatch(unittest.IsolatedAsyncioTestCase):
+    """Test cases for scraping several URLs on the shared browser."""
+    
+    def setUp(self):
+        WebScraperAgent.clear_cache()
+        self.active = 0
+        self.max_active = 0
+        self.agent = WebScraperAgent()
+        self.agent.browser = MagicMock()
+        self.agent.browser.is_connected.return_value = True
+        self.agent.context = MagicMock()
+        self.agent.context.new_page = AsyncMock(side_effect=self._new_page)
+    
+    def tearDown(self):
+        WebScraperAgent.clear_cache()
+    
+    async def _new_page(self):
+        """Open a mock page that renders its URL and tracks open pages."""
+        page = _make_page()
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        
+        async def _goto(url, **kwargs):
+            await asyncio.sleep(0.01)
+            if url.endswith('/broken'):
+                raise RuntimeError("navigation failed")
+            page.content.return_value = '<html>%s</html>' % url
+        
+        async def _close():
+            self.active -= 1
+        
+        page.goto.side_effect = _goto
+        page.close.side_effect = _close
+        return page
+    
+    async def test_results_keep_order_and_return_exceptions(self):
+        """Test that results line up with urls and a failure doesn't raise."""
+        urls = [URL + '/1', URL + '/broken', URL + '/3']
+        
+        with patch('web_scraper._fetch_static', AsyncMock(return_value=None)):
+            results = await self.agent.scrape_batch(urls)
+        
+        self.assertEqual(results[0], '<html>%s</html>' % urls[0])
+        self.assertIsInstance(results[1], RuntimeError)
+        self.assertEqual(results[2], '<html>%s</html>' % urls[2])
+    
+    async def test_open_pages_are_bounded(self):
+        """Test that no more than max_concurrency pages are open at once."""
+        urls = [URL + '/%d' % i for i in range(6)]
+        
+        with patch('web_scraper._fetch_static', AsyncMock(return_value=None)):
+            await self.agent.scrape_batch(urls, max_concurrency=2)
+        
+        self.assertEqual(self.max_active, 2)
+        self.assertEqual(self.agent.context.new_page.await_count, 6)
+        self.assertEqual(self.active, 0)
+    
+    async def test_cached_and_static_urls_open_no_page(self):
+        """Test that a batch served without rendering never launches a browser."""
+        agent = WebScraperAgent()
+        agent.init_browser = AsyncMock()
+        WebScraperAgent._cache_content(URL, RENDERED_HTML)
+        fetch = AsyncMock(return_value=STATIC_HTML)
+        
+        with patch('web_scraper._fetch_static', fetch):
+            results = await agent.scrape_batch([URL, URL + '/static'])
+        
+        self.assertEqual(results, [RENDERED_HTML, STATIC_HTML])
+        fetch.assert_awaited_once_with(URL + '/static')
+        agent.init_browser.assert_not_awaited()
+    
+    async def test_browser_is_launched_once(self):
+        """Test that concurrent pages share a single lazy browser launch."""
+        agent = WebScraperAgent()
+        
+        async def _init_browser():
+            await asyncio.sleep(0.01)
+            agent.browser = self.agent.browser
+            agent.context = self.agent.context
+        
+        agent.init_browser = AsyncMock(side_effect=_init_browser)
+        
+        with patch('web_scraper._fetch_static', AsyncMock(return_value=None)):
+            await agent.scrape_batch([URL + '/1', URL + '/2', URL + '/3'])
+        
+        agent.init_browser.assert_awaited_once()
+
+
+def _make_screenshot_page(fingerprint='https://example.com|Courses|0|42'):
+    """Create a mock Page whose screenshots count up and whose fingerprint is settable."""
+    page = MagicMock()
+    page.evaluate = AsyncMock(return_value=fingerprint)
+    page.screenshot = AsyncMock(side_effect=lambda **kwargs: b'shot%d' % page.screenshot.await_count)
+    return page
+
+
+class TestScreenshotCache(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the opt-in fingerprint cache of screenshot_buffer."""
+    
+    async def test_cache_is_off_by_default(self):
+        """Test that without use_cache every call rasterizes."""
+        agent = WebScraperAgent()
+        page = _make_screenshot_page()
+        
+        await agent.screenshot_buffer(page)
+        await agent.screenshot_buffer(page)
+        
+        self.assertEqual(page.screenshot.await_count, 2)
+        page.evaluate.assert_not_awaited()
+    
+    async def test_unchanged_page_reuses_capture(self):
+        """Test that a matching fingerprint returns the cached bytes."""
+        agent = WebScraperAgent()
+        page = _make_screenshot_page()
+        
+        first = await agent.screenshot_buffer(page, use_cache=True)
+        second = await agent.screenshot_buffer(page, use_cache=True)
+        
+        self.assertEqual(first, second)
+        page.screenshot.assert_awaited_once()
+    
+    async def test_changed_page_is_recaptured(self):
+        """Test that a different fingerprint or format takes a new screenshot."""
+        agent = WebScraperAgent()
+        page = _make_screenshot_page()
+        
+        first = await agent.screenshot_buffer(page, use_cache=True)
+        page.evaluate.return_value = 'https://example.com|Courses|300|42'
+        second = await agent.screenshot_buffer(page, use_cache=True)
+        third = await agent.screenshot_buffer(page, fmt='png', use_cache=True)
+        
+        self.assertEqual(len({first, second, third}), 3)
+        self.assertEqual(page.screenshot.await_count, 3)
+    
+    async def test_least_recently_used_capture_is_evicted(self):
+        """Test that the cache keeps at most SCREENSHOT_CACHE_MAX_ENTRIES captures."""
+        agent = WebScraperAgent()
+        page = _make_screenshot_page()
+        
+        with patch('web_scraper.SCREENSHOT_CACHE_MAX_ENTRIES', 2):
+            for fingerprint in ('a', 'b', 'a', 'c'):
+                page.evaluate.return_value = fingerprint
+                await agent.screenshot_buffer(page, use_cache=True)
+        
+        self.assertEqual([key[0] for key in agent._shot_cache], ['a', 'c'])
+        self.assertEqual(page.screenshot.await_count, 3)
+
+
+def _make_persistent_context():
+    """Create a mock persistent context that starts with one blank page."""
+    context = MagicMock()
+    context.pages = [_make_page(url='about:blank')]
+    context.new_page = AsyncMock(side_effect=lambda: _make_page())
+    context.route = AsyncMock()
+    context.close = AsyncMock()
+    return context
+
+
+class TestPersistentProfile(unittest.IsolatedAsyncioTestCase):
+    """Test cases for agents running on the on-disk browser profile."""
+    
+    def setUp(self):
+        self.contexts = []
+        
+        async def _launch_persistent_context(*args, **kwargs):
+            self.contexts.append(_make_persistent_context())
+            return self.contexts[-1]
+        
+        playwright = MagicMock()
+        playwright.chromium.launch_persistent_context = AsyncMock(
+            side_effect=_launch_persistent_context
+        )
+        self.pool = MagicMock()
+        self.pool.get_playwright = AsyncMock(return_value=playwright)
+        self.pool.acquire = AsyncMock()
+        self.pool.release = AsyncMock()
+        self.launch = playwright.chromium.launch_persistent_context
+        patcher = patch('web_scraper.browser_pool', self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    async def test_reuses_initial_page_without_pool(self):
+        """Test that the context's initial page is used and the pool isn't touched."""
+        agent = WebScraperAgent(persistent_profile=True)
+        
+        await agent.init_browser()
+        
+        self.assertIs(agent.page, self.contexts[0].pages[0])
+        self.contexts[0].new_page.assert_not_awaited()
+        self.assertEqual(self.launch.await_args.args[0], web_scraper.BROWSER_PROFILE_DIR)
+        self.pool.acquire.assert_not_awaited()
+    
+    async def test_second_init_opens_new_page_on_same_context(self):
+        """Test that re-initializing keeps the running persistent browser."""
+        agent = WebScraperAgent(persistent_profile=True)
+        
+        await agent.init_browser()
+        await agent.init_browser()
+        
+        self.launch.assert_awaited_once()
+        self.contexts[0].new_page.assert_awaited_once()
+    
+    async def test_close_closes_context_without_release(self):
+        """Test that close shuts the persistent browser and never releases to the pool."""
+        agent = WebScraperAgent(persistent_profile=True)
+        await agent.init_browser()
+        
+        await agent.close()
+        
+        self.contexts[0].close.assert_awaited_once()
+        self.pool.release.assert_not_awaited()
+        self.assertIsNone(agent.context)
+    
+    async def test_closed_context_is_relaunched(self):
+        """Test that a crashed persistent browser is relaunched on next use."""
+        agent = WebScraperAgent(persistent_profile=True)
+        await agent.init_browser()
+        event, handler = self.contexts[0].on.call_args.args
+        self.assertEqual(event, 'close')
+        
+        handler(self.contexts[0])
+        self.assertFalse(agent._is_connected())
+        async with agent.new_page():
+            pass
+        
+        self.assertEqual(self.launch.await_count, 2)
+        self.assertIs(agent.context, self.contexts[1])
+
+
+class TestFetchClientEventLoops(unittest.TestCase):
+    """Test cases for the fetch client shared within an event loop."""
+    
+    def test_new_event_loop_gets_new_client(self):
+        """Test that a second asyncio.run doesn't reuse a closed loop's client."""
+        async def _client():
+            return _get_fetch_client()
+        
+        first = asyncio.run(_client())
+        second = asyncio.run(_client())
+        
+        self.assertIsNot(first, second)
+    
+    def test_client_is_shared_within_a_loop(self):
+        """Test that fetches on one loop share a client until it is closed."""
+        async def _clients():
+            first = _get_fetch_client()
+            second = _get_fetch_client()
+            await close_fetch_client()
+            third = _get_fetch_client()
+            await close_fetch_client()
+            return first, second, third
+        
+        first, second, third = asyncio.run(_clients())
+        
+        self.assertIs(first, second)
+        self.assertIsNot(first, third)
+        self.assertTrue(first.is_closed)
+
+
+if __name__ == '__main__':
+    unittest.main()